@@ -0,0 +1,300 @@
+# ruff: noqa: INP001
+"""Measure the overhead ironhide adds on top of the provider.
+
+Every agent talks to an in-process ``MockProvider`` answering instantly, so
+the timings are dominated by ironhide itself. The time spent inside the
+provider is reported separately and subtracted from ``overhead_us``.
+
+Run ``python benchmarks/bench.py --output results.json`` and compare the
+JSON files of two revisions to catch regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+import httpx
+from mock_provider import MockProvider
+from pydantic import BaseModel, SecretStr
+
+from ironhide import BaseAgent, _local_completion, tool
+from ironhide.batch import BatchError
+from ironhide.models import _Message, _Role, _Usage
+
+HISTORY_SIZES = (10, 100, 1000, 10000)
+TOOL_ROUNDS = 5
+BATCH_SIZE = 100
+
+
+class Invoice(BaseModel):
+    """Structured answer used by the benchmarks."""
+
+    number: str
+    customer: str
+    total: float
+    paid: bool
+    items: list[str]
+
+
+class BenchAgent(BaseAgent):
+    """Agent with a few tools of different signatures."""
+
+    instructions = "You are a benchmark."
+
+    @tool
+    def lookup(self, key: str) -> str:
+        """Look a key up."""
+        return key
+
+    @tool
+    def add(self, a: int, b: int) -> int:
+        """Add two numbers."""
+        return a + b
+
+    @tool
+    async def flag(self, name: str, value: bool) -> str:  # noqa: FBT001
+        """Set a flag."""
+        return f"{name}={value}"
+
+
+def _agent(provider: MockProvider) -> BenchAgent:
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=provider),
+        base_url="http://mock",
+    )
+    agent = BenchAgent(api_key=SecretStr("mock"), model="mock", client=client)
+    agent.provider_url = "http://mock/v1/"
+    return agent
+
+
+def _summary(
+    name: str,
+    timings: list[float],
+    provider: MockProvider | None = None,
+    **extra: Any,  # noqa: ANN401
+) -> dict[str, Any]:
+    timings_us = sorted(timing * 1e6 for timing in timings)
+    mean_us = statistics.fmean(timings_us)
+    provider_us = provider.busy * 1e6 / len(timings) if provider else 0.0
+    return {
+        "name": name,
+        "iterations": len(timings),
+        "mean_us": round(mean_us, 2),
+        "p50_us": round(timings_us[len(timings_us) // 2], 2),
+        "p95_us": round(timings_us[int(len(timings_us) * 0.95)], 2),
+        "min_us": round(timings_us[0], 2),
+        "provider_us": round(provider_us, 2),
+        "overhead_us": round(mean_us - provider_us, 2),
+        **extra,
+    }
+
+
+async def _time(
+    iterations: int,
+    function: Callable[[], Awaitable[object]],
+    setup: Callable[[], object] | None = None,
+) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _sync(function: Callable[[], object]) -> object:
+    return function()
+
+
+def _reset(agent: BenchAgent) -> Callable[[], None]:
+    def reset() -> None:
+        agent.messages.clear()
+        agent.usage_history.clear()
+
+    return reset
+
+
+async def bench_helpers(iterations: int) -> list[dict[str, Any]]:
+    """Time the pure-Python helpers called on every request."""
+    agent = _agent(MockProvider())
+    usage = _Usage(prompt_tokens=100, completion_tokens=10, total_tokens=110)
+    completion = _local_completion("mock", "answer")
+    completion.usage = usage
+    for _ in range(1000):
+        agent._record_usage(completion)  # noqa: SLF001
+    return [
+        _summary(
+            "generate_tools",
+            await _time(iterations, lambda: _sync(agent._generate_tools)),  # noqa: SLF001
+        ),
+        _summary(
+            "make_response_format_section",
+            await _time(
+                iterations,
+                lambda: _sync(lambda: agent._make_response_format_section(Invoice)),  # noqa: SLF001
+            ),
+        ),
+        _summary(
+            "calculate_usage_1000",
+            await _time(iterations, lambda: _sync(agent._calculate_usage)),  # noqa: SLF001
+        ),
+        _summary(
+            "record_usage",
+            await _time(
+                iterations,
+                lambda: _sync(lambda: agent._record_usage(completion)),  # noqa: SLF001
+            ),
+        ),
+    ]
+
+
+async def bench_api_call(iterations: int) -> list[dict[str, Any]]:
+    """Time single requests, plain and structured, and their scaling with history."""
+    results = []
+    for size in (0, *HISTORY_SIZES):
+        provider = MockProvider()
+        agent = _agent(provider)
+        for index in range(size // 2):
+            agent.messages.extend(
+                (
+                    _Message(role=_Role.user, content=f"question {index}"),
+                    _Message(role=_Role.assistant, content=provider.content),
+                ),
+            )
+        await agent._add_user_message("question")  # noqa: SLF001
+        base = len(agent.messages)
+        await agent._api_call()  # noqa: SLF001
+        provider.busy = 0.0
+
+        def reset(agent: BenchAgent = agent, base: int = base) -> None:
+            del agent.messages[base:]
+
+        timings = await _time(iterations, agent._api_call, reset)  # noqa: SLF001
+        results.append(
+            _summary(f"api_call_history_{size}", timings, provider, messages=base),
+        )
+
+    provider = MockProvider()
+    agent = _agent(provider)
+    await agent._add_user_message("question")  # noqa: SLF001
+    timings = await _time(
+        iterations,
+        lambda: agent._api_call(response_format=Invoice),  # noqa: SLF001
+        lambda: agent.messages.pop() if len(agent.messages) > 1 else None,
+    )
+    results.append(_summary("api_call_structured", timings, provider))
+    return results
+
+
+async def bench_chat(iterations: int) -> list[dict[str, Any]]:
+    """Time whole turns: plain, streamed, structured and with tool loops."""
+    results = []
+    provider = MockProvider()
+    agent = _agent(provider)
+    timings = await _time(iterations, lambda: agent.chat("hello"), _reset(agent))
+    results.append(_summary("chat", timings, provider))
+
+    provider = MockProvider()
+    agent = _agent(provider)
+
+    async def stream() -> None:
+        async for _ in agent.stream_chat("hello"):
+            pass
+
+    timings = await _time(iterations, stream, _reset(agent))
+    results.append(_summary("stream_chat", timings, provider))
+
+    provider = MockProvider()
+    agent = _agent(provider)
+    timings = await _time(
+        iterations,
+        lambda: agent.structured_chat("hello", Invoice),
+        _reset(agent),
+    )
+    results.append(_summary("structured_chat", timings, provider))
+
+    provider = MockProvider(tool_rounds=TOOL_ROUNDS)
+    agent = _agent(provider)
+    timings = await _time(iterations, lambda: agent.chat("hello"), _reset(agent))
+    tool_calls = TOOL_ROUNDS * len(agent.tools) * iterations
+    results.append(
+        _summary(
+            "tool_loop",
+            timings,
+            provider,
+            tool_calls_per_second=round(tool_calls / sum(timings), 1),
+        ),
+    )
+    return results
+
+
+async def bench_batch(iterations: int) -> list[dict[str, Any]]:
+    """Time ``batch_structured_chat`` through the mock ``files`` and ``batches``.
+
+    Every answer must validate, so the run also checks the batch round trip.
+    """
+    provider = MockProvider()
+    agent = _agent(provider)
+    inputs = [f"invoice {index}" for index in range(BATCH_SIZE)]
+
+    async def batch() -> None:
+        results = await agent.batch_structured_chat(inputs, Invoice)
+        errors = [result for result in results if isinstance(result, BatchError)]
+        if errors:
+            raise errors[0]
+        if len(results) != len(inputs):
+            message = f"{len(results)} results for {len(inputs)} inputs"
+            raise RuntimeError(message)
+
+    timings = await _time(iterations, batch, _reset(agent))
+    return [_summary("batch_structured_chat", timings, provider, inputs=BATCH_SIZE)]
+
+
+async def main(iterations: int) -> dict[str, Any]:
+    """Run every benchmark.
+
+    Args:
+        iterations: Repetitions of each measurement.
+
+    Returns:
+        The JSON-ready report.
+
+    """
+    try:
+        ironhide_version = version("ironhide")
+    except PackageNotFoundError:
+        ironhide_version = "unknown"
+    return {
+        "ironhide": ironhide_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "results": [
+            *await bench_helpers(iterations * 10),
+            *await bench_api_call(iterations),
+            *await bench_chat(iterations),
+            *await bench_batch(max(iterations // 10, 1)),
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", type=Path)
+    arguments = parser.parse_args()
+    report = json.dumps(asyncio.run(main(arguments.iterations)), indent=2)
+    if arguments.output:
+        arguments.output.write_text(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
@@ -0,0 +1,109 @@
+# ruff: noqa: INP001
+"""Measure the memory held by conversation histories, in bytes per message.
+
+Each history is built with ``tracemalloc`` running, once as a plain list of
+``_Message`` models, their JSON cache still empty, and once as a
+``MessageHistory``.
+
+Run ``python benchmarks/memory.py --output memory.json``.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import sys
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from ironhide.history import MessageHistory
+from ironhide.models import _Message, _Role, _ToolCall, _ToolFunction
+
+SIZE = 10000
+
+
+def _text(index: int) -> Iterator[_Message]:
+    yield _Message(role=_Role.user, content=f"What is the status of order {index}?")
+    yield _Message(
+        role=_Role.assistant,
+        content=f"Order {index} shipped yesterday and arrives on Friday.",
+    )
+
+
+def _tools(index: int) -> Iterator[_Message]:
+    yield _Message(role=_Role.user, content=f"Look up order {index}.")
+    yield _Message(
+        role=_Role.assistant,
+        tool_calls=[
+            _ToolCall(
+                id=f"call_{index}",
+                type="function",
+                function=_ToolFunction(
+                    name="lookup_order",
+                    arguments=json.dumps({"order": index}),
+                ),
+            ),
+        ],
+    )
+    yield _Message(
+        role=_Role.tool,
+        content=json.dumps({"order": index, "status": "shipped"}),
+        tool_call_id=f"call_{index}",
+    )
+    yield _Message(role=_Role.assistant, content=f"Order {index} has shipped.")
+
+
+def _measure(build: Callable[[], object]) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        history = build()
+        gc.collect()
+        return history, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def _messages(turn: Callable[[int], Iterator[_Message]]) -> Iterator[_Message]:
+    turns = (message for index in itertools.count() for message in turn(index))
+    return itertools.islice(turns, SIZE)
+
+
+def bench(name: str, turn: Callable[[int], Iterator[_Message]]) -> dict[str, Any]:
+    """Compare the two representations of a history of ``SIZE`` messages."""
+    _, models_bytes = _measure(lambda: list(_messages(turn)))
+    _, history_bytes = _measure(lambda: MessageHistory(_messages(turn)))
+    return {
+        "name": name,
+        "messages": SIZE,
+        "models_bytes_per_message": round(models_bytes / SIZE, 1),
+        "history_bytes_per_message": round(history_bytes / SIZE, 1),
+        "ratio": round(models_bytes / history_bytes, 2),
+    }
+
+
+def main() -> dict[str, Any]:
+    """Run every memory benchmark.
+
+    Returns:
+        The JSON-ready report.
+
+    """
+    return {
+        "python": sys.version.split()[0],
+        "results": [bench("text", _text), bench("tool_calls", _tools)],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path)
+    arguments = parser.parse_args()
+    report = json.dumps(main(), indent=2)
+    if arguments.output:
+        arguments.output.write_text(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
@@ -0,0 +1,406 @@
+# ruff: noqa: INP001
+"""Local OpenAI-compatible provider answering ``chat/completions`` and ``embeddings``.
+
+The ``files`` and ``batches`` endpoints are served too: a batch is run as
+soon as it is created, so it is already ``completed`` when first polled.
+
+The provider is an ASGI application, so it can be used in-process with
+``httpx.ASGITransport`` or served over TCP with ``python mock_provider.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, MutableMapping
+from dataclasses import dataclass, field
+from typing import Any
+
+type Message = MutableMapping[str, Any]
+type Scope = MutableMapping[str, Any]
+type Receive = Callable[[], Awaitable[Message]]
+type Send = Callable[[Message], Awaitable[None]]
+
+_ARGUMENT_SAMPLES = {"string": "x", "number": 1, "integer": 1, "boolean": True}
+_BATCH_PATH = re.compile(r"/(files|batches)(?:/([^/]+))?(?:/(content|cancel))?$")
+
+
+@dataclass
+class MockProvider:
+    """Deterministic stand-in for a provider.
+
+    Attributes:
+        latency: Seconds to wait before answering each request.
+        content: Text of every answer. Structured requests get a minimal
+            object matching their schema instead.
+        tool_rounds: Number of consecutive answers calling every tool of
+            the request before the final answer.
+        error_rate: Share of requests failing with ``error_status``.
+        error_status: HTTP status of injected errors.
+        seed: Seed of the error injection.
+        requests: Number of requests served.
+        busy: Seconds spent serving requests, latency excluded.
+        files: Uploaded and generated files, by id.
+        batches: Created batches, by id.
+
+    """
+
+    latency: float = 0.0
+    content: str = "The quick brown fox jumps over the lazy dog."
+    tool_rounds: int = 0
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 0
+    requests: int = 0
+    busy: float = 0.0
+    files: dict[str, bytes] = field(default_factory=dict)
+    batches: dict[str, dict[str, Any]] = field(default_factory=dict)
+    _random: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Seed the error injection."""
+        self._random = random.Random(self.seed)  # noqa: S311
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve one ASGI request."""
+        if scope["type"] != "http":
+            return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        start = time.perf_counter()
+        try:
+            await self._answer(scope, body, send)
+        finally:
+            self.busy += time.perf_counter() - start
+
+    async def _answer(self, scope: Scope, body: bytes, send: Send) -> None:
+        if self.error_rate and self._random.random() < self.error_rate:
+            error = {
+                "error": {"message": "injected", "type": "server_error", "code": None},
+            }
+            await _respond(send, self.error_status, [json.dumps(error).encode()])
+            return
+        if _BATCH_PATH.search(scope["path"]):
+            status, payload = self._batch_api(scope, body)
+            content_type = "application/json"
+            if isinstance(payload, dict):
+                payload = json.dumps(payload).encode()
+            else:
+                content_type = "application/jsonl"
+            await _respond(send, status, [payload], content_type)
+            return
+        request = json.loads(body or b"{}")
+        if scope["path"].endswith("/embeddings"):
+            await _respond(send, 200, [json.dumps(_embedding(request)).encode()])
+        elif request.get("stream"):
+            await _respond(send, 200, self._stream(request), "text/event-stream")
+        else:
+            await _respond(send, 200, [json.dumps(self._completion(request)).encode()])
+
+    def _batch_api(
+        self,
+        scope: Scope,
+        body: bytes,
+    ) -> tuple[int, dict[str, Any] | bytes]:
+        """Serve the ``files`` and ``batches`` endpoints."""
+        match = _BATCH_PATH.search(scope["path"])
+        if match is None:
+            return 404, _not_found(scope["path"])
+        resource, resource_id, action = match.groups()
+        if resource == "files":
+            return self._files_api(scope, body, resource_id, action)
+        if resource_id is None:
+            request = json.loads(body)
+            if request.get("input_file_id") not in self.files:
+                return 404, _not_found(str(request.get("input_file_id")))
+            return 200, self._run_batch(request)
+        batch = self.batches.get(resource_id)
+        if batch is None:
+            return 404, _not_found(scope["path"])
+        if action == "cancel" and batch["status"] != "completed":
+            batch["status"] = "cancelled"
+        return 200, batch
+
+    def _files_api(
+        self,
+        scope: Scope,
+        body: bytes,
+        file_id: str | None,
+        action: str | None,
+    ) -> tuple[int, dict[str, Any] | bytes]:
+        if file_id is None:
+            headers = dict(scope.get("headers", []))
+            content_type = headers.get(b"content-type", b"").decode()
+            file_id = self._add_file(_multipart_file(content_type, body))
+            return 200, {"id": file_id, "object": "file", "purpose": "batch"}
+        if action != "content" or file_id not in self.files:
+            return 404, _not_found(scope["path"])
+        return 200, self.files[file_id]
+
+    def _add_file(self, content: bytes) -> str:
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = content
+        return file_id
+
+    def _run_batch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answer every request of a batch input file, in order."""
+        outputs: list[dict[str, Any]] = []
+        for line in self.files[request["input_file_id"]].splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            outputs.append(
+                {
+                    "id": f"batch_req_{len(outputs)}",
+                    "custom_id": item["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": self._completion(item["body"]),
+                    },
+                    "error": None,
+                },
+            )
+        batch_id = f"batch_{len(self.batches)}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "status": "completed",
+            "output_file_id": self._add_file(
+                b"\n".join(json.dumps(output).encode() for output in outputs),
+            ),
+            "error_file_id": None,
+            "errors": None,
+        }
+        return self.batches[batch_id]
+
+    def _message(self, request: dict[str, Any]) -> dict[str, Any]:
+        rounds = 0
+        for message in reversed(request["messages"]):
+            if message["role"] == "user":
+                break
+            rounds += bool(message.get("tool_calls"))
+        tools = request.get("tools") or []
+        if tools and request.get("tool_choice") != "none" and rounds < self.tool_rounds:
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{rounds}_{index}",
+                        "type": "function",
+                        "function": {
+                            "name": tool["function"]["name"],
+                            "arguments": json.dumps(
+                                _sample(tool["function"]["parameters"]),
+                            ),
+                        },
+                    }
+                    for index, tool in enumerate(tools)
+                ],
+            }
+        response_format = request.get("response_format")
+        if response_format:
+            content = json.dumps(_sample(response_format["json_schema"]["schema"]))
+        else:
+            content = self.content
+        return {"role": "assistant", "content": content}
+
+    def _completion(self, request: dict[str, Any]) -> dict[str, Any]:
+        message = self._message(request)
+        return {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls"
+                    if "tool_calls" in message
+                    else "stop",
+                },
+            ],
+            "usage": _usage(request, message),
+        }
+
+    async def _stream(self, request: dict[str, Any]) -> AsyncIterator[bytes]:
+        message = self._message(request)
+        envelope = {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+        }
+        deltas: list[dict[str, Any]] = [
+            {"role": "assistant", "content": word}
+            for word in re.findall(r"\S+\s*", message["content"] or "")
+        ]
+        if "tool_calls" in message:
+            deltas = [
+                {"tool_calls": [{"index": index, **tool_call}]}
+                for index, tool_call in enumerate(message["tool_calls"])
+            ]
+        for delta in deltas:
+            chunk = {**envelope, "choices": [{"index": 0, "delta": delta}]}
+            yield b"data: " + json.dumps(chunk).encode() + b"\n\n"
+        final = {**envelope, "choices": [], "usage": _usage(request, message)}
+        yield b"data: " + json.dumps(final).encode() + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+
+def _sample(schema: dict[str, Any]) -> Any:  # noqa: ANN401
+    """Build the smallest value matching a JSON schema."""
+    if schema.get("type") == "object":
+        return {
+            name: _sample(prop) for name, prop in schema.get("properties", {}).items()
+        }
+    if schema.get("type") == "array":
+        return []
+    if "anyOf" in schema:
+        return _sample(schema["anyOf"][0])
+    return _ARGUMENT_SAMPLES.get(schema.get("type", "string"))
+
+
+def _usage(request: dict[str, Any], message: dict[str, Any]) -> dict[str, int]:
+    prompt_tokens = len(json.dumps(request["messages"])) // 4
+    completion_tokens = len(json.dumps(message)) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _multipart_file(content_type: str, body: bytes) -> bytes:
+    """Extract the ``file`` field of a ``multipart/form-data`` body."""
+    boundary = content_type.partition("boundary=")[2].strip('"').encode()
+    for part in body.split(b"--" + boundary):
+        head, _, content = part.partition(b"\r\n\r\n")
+        if b'name="file"' in head:
+            return content.removesuffix(b"\r\n")
+    return b""
+
+
+def _not_found(name: str) -> dict[str, Any]:
+    return {
+        "error": {
+            "message": f"{name} not found",
+            "type": "invalid_request_error",
+            "code": None,
+        },
+    }
+
+
+def _embedding(request: dict[str, Any]) -> dict[str, Any]:
+    text = str(request.get("input", ""))
+    vector = [float(text.count(letter)) + 1 for letter in "etaoinshrdlu"]
+    return {"object": "list", "data": [{"index": 0, "embedding": vector}]}
+
+
+async def _respond(
+    send: Send,
+    status: int,
+    body: list[bytes] | AsyncIterator[bytes],
+    content_type: str = "application/json",
+) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode())],
+        },
+    )
+    if isinstance(body, list):
+        await send({"type": "http.response.body", "body": b"".join(body)})
+        return
+    async for part in body:
+        await send({"type": "http.response.body", "body": part, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def serve(provider: MockProvider, host: str, port: int) -> None:
+    """Serve the provider over HTTP/1.1 with keep-alive.
+
+    Args:
+        provider: The provider to serve.
+        host: Interface to listen on.
+        port: Port to listen on.
+
+    """
+
+    async def handle(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        while request_line := await reader.readline():
+            method, path, _ = request_line.decode().split(" ", 2)
+            headers: dict[str, str] = {}
+            while (line := await reader.readline()) not in {b"\r\n", b""}:
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            async def receive(body: bytes = body) -> Message:
+                return {"type": "http.request", "body": body}
+
+            async def send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    writer.write(
+                        b"HTTP/1.1 %d OK\r\n" % message["status"]
+                        + b"".join(
+                            b"%s: %s\r\n" % header for header in message["headers"]
+                        )
+                        + b"transfer-encoding: chunked\r\n\r\n",
+                    )
+                elif message["body"]:
+                    writer.write(
+                        b"%x\r\n%s\r\n" % (len(message["body"]), message["body"]),
+                    )
+                if message["type"] == "http.response.body" and not message.get(
+                    "more_body",
+                ):
+                    writer.write(b"0\r\n\r\n")
+                await writer.drain()
+
+            scope = {
+                "type": "http",
+                "method": method,
+                "path": path,
+                "headers": [
+                    (name.encode(), value.encode()) for name, value in headers.items()
+                ],
+            }
+            await provider(scope, receive, send)
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--tool-rounds", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    arguments = parser.parse_args()
+    provider = MockProvider(
+        latency=arguments.latency,
+        tool_rounds=arguments.tool_rounds,
+        error_rate=arguments.error_rate,
+    )
+    asyncio.run(serve(provider, arguments.host, arguments.port))
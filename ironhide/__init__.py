@@ -1,196 +1,519 @@
-import base64
+import asyncio
 import inspect
 import json
 import logging
+import time
 from abc import ABC
-from asyncio import sleep
-from collections.abc import Buffer, Callable
-from enum import Enum
-from http import HTTPStatus
-from typing import Annotated, Any, Literal, TypeVar, get_args, get_origin
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Sequence,
+)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import (
+    AbstractContextManager,
+    aclosing,
+    contextmanager,
+    nullcontext,
+    suppress,
+)
+from contextvars import ContextVar, copy_context
+from functools import cache, lru_cache, partial
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    ClassVar,
+    Literal,
+    Self,
+    TypeVar,
+    get_args,
+    get_origin,
+    overload,
+)
 
 import httpx
 from httpx._types import RequestFiles
-from pydantic import BaseModel, Field, SecretStr, ValidationError
-
+from pydantic import BaseModel, ConfigDict, SecretStr, ValidationError
+
+from ironhide.audio import audio_transcription
+from ironhide.batch import BatchError, run_batch
+from ironhide.caching import CompletionCache, cache_key
+from ironhide.context import SUMMARY_PREFIX, ContextPolicy, estimate_tokens
+from ironhide.history import MessageHistory, _stored
+from ironhide.images import ImageFiles, encode_image, iter_images
+from ironhide.ledger import CostLedger
+from ironhide.models import (
+    _ChatCompletion,
+    _ChatCompletionChunk,
+    _Choice,
+    _CompletionTokensDetails,
+    _Data,
+    _ErrorResponse,
+    _FunctionDefinition,
+    _Headers,
+    _ImageUrlContent,
+    _JsonSchema,
+    _Message,
+    _ParametersDefinition,
+    _PromptTokensDetails,
+    _PropertyDefinition,
+    _Record,
+    _ResponseFormat,
+    _Role,
+    _StreamOptions,
+    _TextContent,
+    _ToolCall,
+    _ToolCallDelta,
+    _ToolDefinition,
+    _ToolFunction,
+    _Usage,
+)
+from ironhide.prompt_cache import (
+    CACHE_CONTROL_PROVIDERS,
+    CACHE_KEY_PROVIDERS,
+    EPHEMERAL,
+    prompt_cache_key,
+    with_cache_control,
+)
+from ironhide.rate_limit import RateLimiter, get_rate_limiter
+from ironhide.retry import RetryPolicy
 from ironhide.settings import settings
-from ironhide.utils import PROVIDER_URLS, Provider
+from ironhide.store import ConversationStore
+from ironhide.telemetry import AttributeValue, Collector, Span, span
+from ironhide.thoughts import Thought, resolve_thoughts
+from ironhide.transport import get_client, make_client
+from ironhide.utils import PROVIDER_URLS, Provider, repair_json, truncate_payload
+
+if TYPE_CHECKING:
+    from ironhide.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
 
-class _PropertyDefinition(BaseModel):
-    type: str
-    description: str
+async def _iter_chunks(response: httpx.Response) -> AsyncIterator[_ChatCompletionChunk]:
+    """Parse the server-sent events of a streamed completion."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line.removeprefix("data:").strip()
+        if payload == "[DONE]":
+            break
+        yield _ChatCompletionChunk.model_validate_json(payload)
+
+
+async def _iter_content(
+    response: httpx.Response,
+    chunks: list[_ChatCompletionChunk],
+) -> AsyncIterator[str]:
+    """Yield the content deltas of a streamed completion, collecting its chunks."""
+    async for chunk in _iter_chunks(response):
+        chunks.append(chunk)
+        for choice in chunk.choices:
+            if choice.delta.content:
+                yield choice.delta.content
+
+
+def _merge_tool_call_delta(
+    tool_calls: dict[int, _ToolCall],
+    tool_call_delta: _ToolCallDelta,
+) -> None:
+    tool_call = tool_calls.setdefault(
+        tool_call_delta.index,
+        _ToolCall(
+            id="",
+            type="function",
+            function=_ToolFunction(name="", arguments=""),
+        ),
+    )
+    if tool_call_delta.id:
+        tool_call.id = tool_call_delta.id
+    if tool_call_delta.extra_content:
+        tool_call.extra_content = tool_call_delta.extra_content
+    if tool_call_delta.function:
+        tool_call.function.name += tool_call_delta.function.name or ""
+        tool_call.function.arguments += tool_call_delta.function.arguments or ""
 
 
-class _ParametersDefinition(BaseModel):
-    type: str = "object"
-    properties: dict[str, _PropertyDefinition]
-    required: list[str]
-    additional_properties: bool = Field(alias="additionalProperties", default=False)
+def _assemble_chunks(chunks: list[_ChatCompletionChunk]) -> _ChatCompletion:
+    """Rebuild a full ``_ChatCompletion`` from the chunks of a streamed response.
 
+    Args:
+        chunks: The parsed ``data:`` events of the stream, in arrival order.
 
-class _FunctionDefinition(BaseModel):
-    name: str
-    description: str
-    parameters: _ParametersDefinition
-    strict: bool = True
+    Returns:
+        The equivalent non-streamed completion.
 
+    Raises:
+        ValueError: If the stream ended before any chunk was received.
 
-class _ToolDefinition(BaseModel):
-    type: str = "function"
-    function: _FunctionDefinition
+    """
+    if not chunks:
+        error = "the stream ended before any completion chunk was received"
+        raise ValueError(error)
+    content: list[str] = []
+    refusal: list[str] = []
+    tool_calls: dict[int, _ToolCall] = {}
+    finish_reason = "stop"
+    usage = _Usage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+    for chunk in chunks:
+        if chunk.usage:
+            usage = chunk.usage
+        for choice in chunk.choices:
+            delta = choice.delta
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            if delta.content:
+                content.append(delta.content)
+            if delta.refusal:
+                refusal.append(delta.refusal)
+            for tool_call_delta in delta.tool_calls or []:
+                _merge_tool_call_delta(tool_calls, tool_call_delta)
+    first = chunks[0]
+    message = _Message(
+        role=_Role.assistant,
+        content="".join(content) if content else None,
+        tool_calls=[tool_calls[i] for i in sorted(tool_calls)] or None,
+        refusal="".join(refusal) if refusal else None,
+    )
+    return _ChatCompletion(
+        id=first.id,
+        object="chat.completion",
+        created=first.created,
+        model=first.model,
+        choices=[_Choice(index=0, message=message, finish_reason=finish_reason)],
+        usage=usage,
+        service_tier=first.service_tier,
+        system_fingerprint=first.system_fingerprint,
+    )
 
 
-class _Headers(BaseModel):
-    content_type: str = Field(
-        alias="Content-Type",
-        default="application/json",
-    )
-    authorization: str = Field(alias="Authorization")
+def _generate_tool_definitions(cls: type) -> list[dict[str, Any]]:
+    """Build the JSON-ready definitions of the ``@tool`` methods of a class.
 
+    Args:
+        cls: The agent class to introspect.
 
-class _Role(str, Enum):
-    system = "system"
-    assistant = "assistant"
-    user = "user"
-    tool = "tool"
+    Returns:
+        The tool definitions, serialized as they are sent to the provider.
 
+    """
+    tools: list[dict[str, Any]] = []
+    json_type_mapping = {
+        str: "string",
+        int: "number",
+        float: "number",
+        bool: "boolean",
+    }
+    for name, method in inspect.getmembers(cls, predicate=callable):
+        if not getattr(method, "is_tool", False):
+            continue
+        properties: dict[str, _PropertyDefinition] = {}
+        required: list[str] = []
+        has_optional_params: bool = False
+        for param_name, param in inspect.signature(method).parameters.items():
+            if param_name == "self":
+                continue
 
-class _PromptTokensDetails(BaseModel):
-    cached_tokens: int = 0
-    audio_tokens: int = 0
+            annotation = param.annotation
+            param_description = ""
+            param_type = annotation
 
+            if get_origin(annotation) is Annotated:
+                args = get_args(annotation)
+                param_type = args[0]
+                if len(args) > 1 and isinstance(args[1], str):
+                    param_description = args[1]
 
-class _CompletionTokensDetails(BaseModel):
-    reasoning_tokens: int = 0
-    audio_tokens: int = 0
-    accepted_prediction_tokens: int = 0
-    rejected_prediction_tokens: int = 0
+            if param.default is param.empty:
+                required.append(param_name)
+            else:
+                has_optional_params = True
 
+            properties[param_name] = _PropertyDefinition(
+                type=json_type_mapping.get(param_type, "string"),
+                description=param_description,
+            )
 
-class _Usage(BaseModel):
-    prompt_tokens: int
-    completion_tokens: int
-    total_tokens: int
-    prompt_tokens_details: _PromptTokensDetails | None = None
-    completion_tokens_details: _CompletionTokensDetails | None = None
+        tool_definition = _ToolDefinition(
+            function=_FunctionDefinition(
+                name=name,
+                description=(inspect.getdoc(method) or "").strip(),
+                parameters=_ParametersDefinition(
+                    properties=properties,
+                    required=required,
+                ),
+                strict=not has_optional_params,
+            ),
+        )
+        tools.append(tool_definition.model_dump(by_alias=True, exclude_none=True))
+    return tools
+
+
+def _remove_defaults(schema: dict[str, Any]) -> None:
+    if isinstance(schema, dict):
+        schema.pop("default", None)
+        schema.pop("format", None)
+        for value in schema.values():
+            if isinstance(value, dict):
+                _remove_defaults(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, dict):
+                        _remove_defaults(item)
+
+
+def _add_additional_properties(obj: dict[str, Any]) -> None:
+    obj["additionalProperties"] = False
+    if "properties" in obj:
+        for def_schema in obj["properties"].values():
+            if isinstance(def_schema, dict):
+                _add_additional_properties(def_schema)
+
+
+def _remove_defs(schema: dict[str, Any]) -> None:
+    if schema.get("$defs"):
+        for i in schema["properties"]:
+            property_ref = schema["properties"][i].get("$ref")
+            if property_ref:  # Check if $ref exists
+                for j in schema["$defs"]:
+                    clean_property = property_ref.replace("#/$defs/", "")
+                    if clean_property == j:
+                        schema["properties"][i] = schema["$defs"][j]
+        schema.pop("$defs")
+
+
+def _decode(message: _Message | _Record) -> _Message:
+    """Return a message, rebuilding it if it is a compact history record."""
+    return message.decode() if isinstance(message, _Record) else message
+
+
+def _local_completion(model: str, content: str) -> _ChatCompletion:
+    """Wrap an answer that did not come from the provider, with zero usage."""
+    return _ChatCompletion(
+        id="local",
+        object="chat.completion",
+        created=int(time.time()),
+        model=model,
+        choices=[
+            _Choice(
+                index=0,
+                message=_Message(role=_Role.assistant, content=content),
+                finish_reason="stop",
+            ),
+        ],
+        usage=_sum_usage([]),
+    )
 
 
-class _ToolFunction(BaseModel):
-    name: str
-    arguments: str
+def _is_valid(
+    completion: _ChatCompletion,
+    response_format: type[BaseModel] | None,
+) -> bool:
+    """Tell whether a completion's answer validates against ``response_format``."""
+    if response_format is None:
+        return True
+    try:
+        response_format.model_validate_json(str(completion.choices[0].message.content))
+    except ValidationError:
+        return False
+    return True
 
 
-class _ThoughtSignature(BaseModel):
-    thought_signature: str
+def _sum_usage(usages: Iterable[_Usage]) -> _Usage:
+    """Add up several usage reports, including their token details.
 
+    Args:
+        usages: The usage reports to add.
 
-class _ExtraContent(BaseModel):
-    google: _ThoughtSignature
+    Returns:
+        A new ``_Usage`` with the totals.
 
+    """
+    usage_total: _Usage = _Usage(
+        prompt_tokens=0,
+        completion_tokens=0,
+        total_tokens=0,
+        prompt_tokens_details=_PromptTokensDetails(
+            cached_tokens=0,
+            audio_tokens=0,
+        ),
+        completion_tokens_details=_CompletionTokensDetails(
+            reasoning_tokens=0,
+            audio_tokens=0,
+            accepted_prediction_tokens=0,
+            rejected_prediction_tokens=0,
+        ),
+    )
+    for usage in usages:
+        _add_usage(usage_total, usage)
+    return usage_total
 
-class _ToolCall(BaseModel):
-    id: str
-    type: Literal["function"]
-    function: _ToolFunction
-    extra_content: _ExtraContent | None = None
 
+def _add_usage(usage_total: _Usage, usage: _Usage) -> None:
+    """Add a usage report to running totals, in place.
 
-class _TextContent(BaseModel):
-    type: str = "text"
-    text: str
+    Args:
+        usage_total: The totals, as returned by ``_sum_usage``.
+        usage: The usage report to add.
 
+    """
+    usage_total.prompt_tokens += usage.prompt_tokens
+    usage_total.completion_tokens += usage.completion_tokens
+    usage_total.total_tokens += usage.total_tokens
 
-class _ImageUrlContent(BaseModel):
-    type: str = "image_url"
-    image_url: dict[str, str]
+    if usage.prompt_tokens_details and usage_total.prompt_tokens_details:
+        usage_total.prompt_tokens_details.cached_tokens += (
+            usage.prompt_tokens_details.cached_tokens
+        )
+        usage_total.prompt_tokens_details.audio_tokens += (
+            usage.prompt_tokens_details.audio_tokens
+        )
 
+    if usage.completion_tokens_details and usage_total.completion_tokens_details:
+        usage_total.completion_tokens_details.reasoning_tokens += (
+            usage.completion_tokens_details.reasoning_tokens
+        )
+        usage_total.completion_tokens_details.audio_tokens += (
+            usage.completion_tokens_details.audio_tokens
+        )
+        usage_total.completion_tokens_details.accepted_prediction_tokens += (
+            usage.completion_tokens_details.accepted_prediction_tokens
+        )
+        usage_total.completion_tokens_details.rejected_prediction_tokens += (
+            usage.completion_tokens_details.rejected_prediction_tokens
+        )
 
-class _Message(BaseModel):
-    role: _Role
-    content: str | list[_TextContent | _ImageUrlContent] | None = None
-    tool_calls: list[_ToolCall] | None = None
-    tool_call_id: str | None = None
-    refusal: str | None = None
-    model_config = {"use_enum_values": True}
 
+@lru_cache(maxsize=settings.ironhide_schema_cache_size)
+def _build_response_format(response_format: type[BaseModel]) -> dict[str, Any]:
+    """Build the JSON-ready ``response_format`` section for a pydantic model.
 
-class _Choice(BaseModel):
-    index: int
-    message: _Message
-    logprobs: dict[str, Any] | None = None
-    finish_reason: str
+    The result is cached per model class, so callers must not mutate it.
 
+    Args:
+        response_format: The pydantic model the response must conform to.
 
-class _ChatCompletion(BaseModel):
-    id: str
-    object: Literal["chat.completion"]
-    created: int
-    model: str
-    choices: list[_Choice]
-    usage: _Usage
-    service_tier: str | None = None
-    system_fingerprint: str | None = None
+    Returns:
+        The serialized ``_ResponseFormat`` with a strict JSON schema.
 
+    """
+    schema = response_format.model_json_schema()
+    _remove_defs(schema)
+    _remove_defaults(schema)
+    _add_additional_properties(schema)
+    properties = schema.get("properties", {})
+    if "required" not in schema:
+        schema["required"] = list(properties.keys())
+
+    return _ResponseFormat(
+        json_schema=_JsonSchema(
+            name=schema["title"],
+            schema=schema,
+        ),
+    ).model_dump(by_alias=True, exclude_none=True)
+
+
+@cache
+def _tool_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all agents to run synchronous tools off the event loop."""
+    return ThreadPoolExecutor(
+        max_workers=settings.ironhide_tool_thread_workers,
+        thread_name_prefix="ironhide-tool",
+    )
 
-class _JsonSchema(BaseModel):
-    name: str
-    schema_: dict[str, Any] = Field(alias="schema")
-    strict: bool = True
 
+T = TypeVar("T", bound=BaseModel)
 
-class _ResponseFormat(BaseModel):
-    type: str = "json_schema"
-    json_schema: _JsonSchema
 
+class Conversation:
+    """State of one conversation with an agent.
 
-class _Data(BaseModel):
-    model: str
-    reasoning_effort: Literal["low", "medium", "high"] | None = None
-    messages: list[_Message]
-    response_format: _ResponseFormat | None = None
-    tools: list[_ToolDefinition] | None = None
-    tool_choice: Literal["none", "auto", "required"] | None = None
+    The agent holds the configuration shared by all its conversations
+    (tools, instructions, client, caches); a conversation only holds its
+    history and usage, so a single agent can serve many of them at once by
+    passing ``conversation=`` to ``chat``, ``stream_chat`` or
+    ``structured_chat``. Calls sharing one conversation must not overlap.
+    The agent's ``tool_concurrency`` caps the tools running in each
+    conversation, not across all of them.
+    """
 
+    __slots__ = (
+        "conversation_id",
+        "last_completion",
+        "loaded",
+        "messages",
+        "tool_semaphore",
+        "usage",
+        "usage_history",
+        "usage_total",
+    )
+
+    last_completion: _ChatCompletion
+
+    def __init__(
+        self,
+        messages: Iterable[_Message] = (),
+        conversation_id: str | None = None,
+    ) -> None:
+        """Start a conversation.
 
-class _Error(BaseModel):
-    message: str
-    type: str
-    param: str | None = None
-    code: str | None
+        Args:
+            messages: Initial chat message history.
+            conversation_id: Conversation to load from and save to the
+                agent's ``store``, if one is set.
 
+        """
+        self.messages = MessageHistory(messages)
+        self.conversation_id = conversation_id
+        self.loaded = False
+        # Created on first use, keeping idle conversations small.
+        self.usage_history: deque[_Usage] | None = None
+        self.usage_total: _Usage | None = None
+        self.usage: _Usage | None = None
+        self.tool_semaphore: asyncio.Semaphore | None = None
+
+    def add_usage(self, usage: _Usage) -> None:
+        """Record the usage of a completion.
 
-class _ErrorResponse(BaseModel):
-    error: _Error
+        Args:
+            usage: The usage report to add to the history and running totals.
 
+        """
+        if self.usage_history is None:
+            self.usage_history = deque(maxlen=settings.ironhide_usage_history_size)
+        if self.usage_total is None:
+            self.usage_total = _sum_usage([])
+        self.usage_history.append(usage)
+        _add_usage(self.usage_total, usage)
 
-async def audio_transcription(files: RequestFiles, api_key: SecretStr) -> str:
-    """Transcribes audio files to text using the OpenAI API.
+    def total_usage(self) -> _Usage:
+        """Return a copy of the running usage totals.
 
-    Args:
-        files: RequestFiles object containing the audio file to transcribe.
-        api_key: OpenAI API key for authentication.
+        Returns:
+            The totals of every completion recorded so far.
 
-    Returns:
-        The transcribed text as a string.
+        """
+        if self.usage_total is None:
+            return _sum_usage([])
+        return self.usage_total.model_copy(deep=True)
 
-    """
-    transcription_url = "https://api.openai.com/v1/audio/transcriptions"
-    transcription_headers = {"Authorization": f"Bearer {api_key.get_secret_value()}"}
-    async with httpx.AsyncClient(timeout=settings.ironhide_request_timeout) as client:
-        data = {"model": settings.ironhide_transcription_model}
-        transcription_response = await client.post(
-            transcription_url,
-            headers=transcription_headers,
-            files=files,
-            data=data,
-        )
-    return str(transcription_response.json().get("text", ""))
 
+# Conversation bound to an agent by its ``conversation=`` argument, for the
+# duration of the call and the tasks it starts.
+_active_conversation: ContextVar[tuple["BaseAgent", Conversation] | None] = ContextVar(
+    "ironhide_conversation",
+    default=None,
+)
 
-T = TypeVar("T", bound=BaseModel)
+# Conversation state that subclasses may still set as class attributes.
+_CONVERSATION_DEFAULTS = ("messages", "conversation_id")
 
 
 class BaseAgent(ABC):
@@ -203,23 +526,24 @@ class BaseAgent(ABC):
         model (str): The AI model identifier to be used.
         provider (Provider): The service provider for the AI model.
         instructions (str | None): System instructions for the agent.
-        chain_of_thought (tuple[str, ...] | None): Sequential prompts for thought process.
+        chain_of_thought (tuple[str | Thought, ...] | None): Prompts for thought process.
+        parallel_thoughts (bool): Whether plain string thoughts are independent.
         feedback_loop (str | None): Prompt for feedback evaluation.
-        messages (list[_Message]): History of chat messages.
+        messages (MessageHistory): History of chat messages, stored compactly.
         instructions (str | None): Initial system instructions for the agent.
-        chain_of_thought (tuple[str, ...] | None): Sequence of thought process prompts.
+        chain_of_thought (tuple[str | Thought, ...] | None): Sequence of thought process prompts.
         feedback_loop (str | None): Feedback evaluation prompt.
         model (str | None): AI model identifier.
         provider (Provider | None): Service provider for the AI model.
-        messages (list[_Message] | None): Initial chat message history.
+        messages (Iterable[_Message] | None): Initial chat message history.
 
     Methods:
-        chat(input_message: str | RequestFiles, files: RequestFiles | None = None) -> str:
+        chat(input_message: str | RequestFiles, files: ImageFiles | None = None) -> str:
             Handle a chat interaction with optional audio or image processing.
                 input_message: User's input message (text or audio files)
                 files: Optional image files for the chat
                 str: The assistant's response
-        structured_chat(input_message: str | RequestFiles, response_format: type[T], files: RequestFiles | None = None) -> T:
+        structured_chat(input_message: str | RequestFiles, response_format: type[T], files: ImageFiles | None = None) -> T:
             Handle a chat interaction with structured response validation.
                 input_message: User's input message (text or audio files)
                 response_format: Pydantic model for response validation
@@ -234,11 +558,44 @@ class BaseAgent(ABC):
     model: str
     reasoning_effort: Literal["low", "medium", "high"] | None = None
     instructions: str | None = None
-    chain_of_thought: tuple[str, ...] | None = None
-    messages: list[_Message]
-    usage_history: list[_Usage]
-    usage: _Usage
-    _last_completion: _ChatCompletion
+    chain_of_thought: tuple[str | Thought, ...] | None = None
+    parallel_thoughts: bool = False
+    tool_concurrency: int | None = None
+    tool_timeout: float | None = None
+    retry_policy: RetryPolicy
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
+    rate_limiter: RateLimiter | None
+    completion_cache: CompletionCache | None = None
+    collector: Collector | None = None
+    ledger: CostLedger | None = None
+    semantic_cache: "SemanticCache | None" = None
+    context_policies: tuple[ContextPolicy, ...] = ()
+    context_budget: int | None = None
+    structured_repair: Literal["replay", "reformat", "feedback"] | None = None
+    image_max_size: int | None = None
+    image_retention: int | None = None
+    prompt_cache: bool = False
+    cache_control: dict[str, str] | None = None
+    store: ConversationStore | None = None
+    history_turns: int | None = None
+    _tool_definitions: ClassVar[list[dict[str, Any]]] = []
+    _class_defaults: ClassVar[dict[str, Any]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:  # noqa: ANN401
+        """Introspect the ``@tool`` methods once, when the subclass is created.
+
+        Class-level ``messages`` and ``conversation_id`` are moved aside so
+        they do not hide the properties resolving the current conversation.
+        """
+        super().__init_subclass__(**kwargs)
+        cls._tool_definitions = _generate_tool_definitions(cls)
+        cls._class_defaults = dict(cls._class_defaults)
+        for name in _CONVERSATION_DEFAULTS:
+            value = cls.__dict__.get(name)
+            if value is not None and not isinstance(value, property):
+                cls._class_defaults[name] = value
+                delattr(cls, name)
 
     def __init__(
         self,
@@ -249,17 +606,24 @@ class BaseAgent(ABC):
         model: str | None = None,
         reasoning_effort: Literal["low", "medium", "high"] | None = None,
         instructions: str | None = None,
-        chain_of_thought: tuple[str, ...] | None = None,
-        messages: list[_Message] | None = None,
+        chain_of_thought: tuple[str | Thought, ...] | None = None,
+        messages: Iterable[_Message] | None = None,
+        client: httpx.AsyncClient | None = None,
+        conversation_id: str | None = None,
     ) -> None:
         """Initialize the BaseAgent with optional configuration parameters.
 
         Args:
             instructions: Initial system instructions for the agent.
-            chain_of_thought: Sequence of thought process prompts.
+            chain_of_thought: Sequence of thought process prompts. ``Thought``
+                steps may declare which earlier steps they depend on.
             model: AI model identifier.
             provider: Service provider for the AI model.
             messages: Initial chat message history.
+            client: HTTP client to use instead of the shared connection pool.
+                The agent never closes a client it did not create.
+            conversation_id: Conversation to load from and save to the
+                ``store``, if one is set.
 
         """
         self.provider = (
@@ -295,22 +659,203 @@ class BaseAgent(ABC):
             "chain_of_thought",
             None,
         )
-        self.messages = (
-            messages or getattr(self, "messages", None) or self.hook_load_messages()
+        self._default_conversation = Conversation(
+            messages
+            or self.messages
+            or self._class_defaults.get("messages")
+            or self.hook_load_messages(),
+            conversation_id
+            or self.conversation_id
+            or self._class_defaults.get("conversation_id"),
+        )
+        self.history_turns = (
+            getattr(self, "history_turns", None) or settings.ironhide_history_turns
+        )
+        self.tool_concurrency = (
+            getattr(self, "tool_concurrency", None)
+            or settings.ironhide_tool_concurrency
+        )
+        self.tool_timeout = (
+            getattr(self, "tool_timeout", None) or settings.ironhide_tool_timeout
+        )
+        self.context_budget = (
+            getattr(self, "context_budget", None) or settings.ironhide_context_budget
+        )
+        self.structured_repair = (
+            getattr(self, "structured_repair", None)
+            or settings.ironhide_structured_repair
+        )
+        self.image_max_size = (
+            getattr(self, "image_max_size", None) or settings.ironhide_image_max_size
+        )
+        self.image_retention = getattr(self, "image_retention", None)
+        if self.image_retention is None:
+            self.image_retention = settings.ironhide_image_retention
+        self.prompt_cache = (
+            getattr(self, "prompt_cache", False) or settings.ironhide_prompt_cache
+        )
+        self.cache_control = getattr(self, "cache_control", None) or (
+            EPHEMERAL if self.provider in CACHE_CONTROL_PROVIDERS else None
+        )
+        self.retry_policy = getattr(self, "retry_policy", None) or RetryPolicy()
+        self.rate_limiter = get_rate_limiter(
+            self.provider_url,
+            self.model,
+            self.requests_per_minute or settings.ironhide_rate_limit_rpm,
+            self.tokens_per_minute or settings.ironhide_rate_limit_tpm,
         )
         self.dict_tool: dict[str, Any] = {}
         self.tools = self._generate_tools()
-        self.client = httpx.AsyncClient()
+        self._client = client
+        self._owns_client = False
+        self._system: _Message | None = None
         self.headers = _Headers(
             Authorization=f"Bearer {self.api_key.get_secret_value()}",
         )
-        self.usage_history: list[_Usage] = []
-        self.usage = _Usage(
+
+    @property
+    def _conversation(self) -> Conversation:
+        """The conversation bound to the current call, or the default one."""
+        active = _active_conversation.get()
+        if active is not None and active[0] is self:
+            return active[1]
+        try:
+            return self._default_conversation
+        except AttributeError:
+            # Subclasses may set ``messages`` before calling ``__init__``.
+            self._default_conversation = Conversation()
+            return self._default_conversation
+
+    @contextmanager
+    def _use_conversation(self, conversation: Conversation | None) -> Iterator[None]:
+        if conversation is None:
+            yield
+            return
+        token = _active_conversation.set((self, conversation))
+        try:
+            yield
+        finally:
+            _active_conversation.reset(token)
+
+    @property
+    def messages(self) -> MessageHistory:
+        """History of the current conversation."""
+        return self._conversation.messages
+
+    @messages.setter
+    def messages(self, messages: Iterable[_Message]) -> None:
+        self._conversation.messages = (
+            messages
+            if isinstance(messages, MessageHistory)
+            else MessageHistory(messages)
+        )
+
+    @property
+    def conversation_id(self) -> str | None:
+        """Identifier of the current conversation in the ``store``."""
+        return self._conversation.conversation_id
+
+    @conversation_id.setter
+    def conversation_id(self, conversation_id: str | None) -> None:
+        self._conversation.conversation_id = conversation_id
+
+    @property
+    def usage_history(self) -> deque[_Usage]:
+        """Usage of the latest completions of the current conversation."""
+        conversation = self._conversation
+        if conversation.usage_history is None:
+            conversation.usage_history = deque(
+                maxlen=settings.ironhide_usage_history_size,
+            )
+        return conversation.usage_history
+
+    @property
+    def usage(self) -> _Usage:
+        """Usage of the current conversation, as of its last finished turn."""
+        return self._conversation.usage or _Usage(
             prompt_tokens=0,
             completion_tokens=0,
             total_tokens=0,
         )
 
+    @usage.setter
+    def usage(self, usage: _Usage) -> None:
+        self._conversation.usage = usage
+
+    @property
+    def _tool_semaphore(self) -> asyncio.Semaphore:
+        """Cap on the tools running at once in the current conversation."""
+        conversation = self._conversation
+        if conversation.tool_semaphore is None:
+            conversation.tool_semaphore = asyncio.Semaphore(
+                self.tool_concurrency or settings.ironhide_tool_concurrency,
+            )
+        return conversation.tool_semaphore
+
+    @property
+    def _last_completion(self) -> _ChatCompletion:
+        return self._conversation.last_completion
+
+    @_last_completion.setter
+    def _last_completion(self, completion: _ChatCompletion) -> None:
+        self._conversation.last_completion = completion
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for every request made by the agent.
+
+        Unless a client was injected, this is the process-wide pooled client
+        for ``provider_url``, or a private client when
+        ``ironhide_shared_client`` is disabled.
+        """
+        if self._client is None:
+            if settings.ironhide_shared_client:
+                return get_client(self.provider_url)
+            self._client = make_client()
+            self._owns_client = True
+        return self._client
+
+    @client.setter
+    def client(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+        self._owns_client = False
+
+    @property
+    def _transcription_client(self) -> httpx.AsyncClient | None:
+        """Client for the transcription endpoint, None for its pooled client.
+
+        The pooled client of ``provider_url`` would not match the OpenAI
+        transcription URL, so the agent's own client is only used when one
+        was injected or ``ironhide_shared_client`` is disabled.
+        """
+        if self._client is None and settings.ironhide_shared_client:
+            return None
+        return self.client
+
+    async def aclose(self) -> None:
+        """Release the HTTP client if the agent owns it.
+
+        Shared pooled clients are left open for other agents; close them
+        with ``ironhide.transport.aclose_clients`` at shutdown.
+        """
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+            self._owns_client = False
+
+    async def __aenter__(self) -> Self:
+        """Enter the agent's async context."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the agent's async context, releasing its HTTP client."""
+        await self.aclose()
+
     def hook_load_messages(self) -> list[_Message]:
         """Load initial message history for the agent.
 
@@ -356,119 +901,123 @@ class BaseAgent(ABC):
     def _make_response_format_section(
         self,
         response_format: type[BaseModel] | None,
-    ) -> _ResponseFormat | None:
+    ) -> dict[str, Any] | None:
         if response_format is None:
             return None
+        return _build_response_format(response_format)
 
-        def remove_defaults(schema: dict[str, Any]) -> None:
-            if isinstance(schema, dict):
-                schema.pop("default", None)
-                schema.pop("format", None)
-                for value in schema.values():
-                    if isinstance(value, dict):
-                        remove_defaults(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, dict):
-                                remove_defaults(item)
-
-        def add_additional_properties(obj: dict[str, Any]) -> None:
-            obj["additionalProperties"] = False
-            if "properties" in obj:
-                for def_schema in obj["properties"].values():
-                    if isinstance(def_schema, dict):
-                        add_additional_properties(def_schema)
-
-        def remove_defs(schema: dict[str, Any]) -> None:
-            if schema.get("$defs"):
-                for i in schema["properties"]:
-                    property_ref = schema["properties"][i].get("$ref")
-                    if property_ref:  # Check if $ref exists
-                        for j in schema["$defs"]:
-                            clean_property = property_ref.replace("#/$defs/", "")
-                            if clean_property == j:
-                                schema["properties"][i] = schema["$defs"][j]
-                schema.pop("$defs")
-
-        schema = response_format.model_json_schema()
-        remove_defs(schema)
-        remove_defaults(schema)
-        add_additional_properties(schema)
-        properties = schema.get("properties", {})
-        if "required" not in schema:
-            schema["required"] = list(properties.keys())
-
-        return _ResponseFormat(
-            json_schema=_JsonSchema(
-                name=schema["title"],
-                schema=schema,
-            ),
-        )
+    def _generate_tools(self) -> list[dict[str, Any]]:
+        for definition in self._tool_definitions:
+            name = definition["function"]["name"]
+            self.dict_tool[name] = getattr(self, name)
+        return list(self._tool_definitions)
 
-    def _generate_tools(self) -> list[_ToolDefinition]:
-        tools: list[_ToolDefinition] = []
-        json_type_mapping = {
-            str: "string",
-            int: "number",
-            float: "number",
-            bool: "boolean",
-        }
-        for name, method in inspect.getmembers(self, predicate=inspect.ismethod):
-            if not getattr(method, "is_tool", False):
-                continue
-            properties: dict[str, _PropertyDefinition] = {}
-            required: list[str] = []
-            has_optional_params: bool = False
-            for param_name, param in inspect.signature(method).parameters.items():
-                if param_name == "self":
-                    continue
+    async def _call_function(self, name: str, args: dict[str, Any]) -> Any:  # noqa: ANN401
+        selected_tool = self.dict_tool[name]
+        async with self._tool_semaphore:
+            if inspect.iscoroutinefunction(selected_tool):
+                call = selected_tool(**args)
+            else:
+                # Like ``asyncio.to_thread``, so the tool sees the bound
+                # conversation through ``self.messages`` and ``self.usage``.
+                call = asyncio.get_running_loop().run_in_executor(
+                    _tool_executor(),
+                    partial(copy_context().run, selected_tool, **args),
+                )
+            with self._span("tool", tool=name):
+                return await asyncio.wait_for(call, self.tool_timeout)
 
-                annotation = param.annotation
-                param_description = ""
-                param_type = annotation
+    async def hook_trace(
+        self,
+        _event: Literal["request", "response"],
+        _payload: dict[str, Any],
+    ) -> None:
+        """Receive every request sent to and response received from the provider.
 
-                if get_origin(annotation) is Annotated:
-                    args = get_args(annotation)
-                    param_type = args[0]
-                    if len(args) > 1 and isinstance(args[1], str):
-                        param_description = args[1]
+        This method can be overridden by subclasses to implement custom
+        tracing (e.g., structured logs or spans). Payloads are only built when
+        this hook is overridden or DEBUG logging is enabled, and long strings
+        such as base64 images are truncated to ``ironhide_log_max_chars``.
 
-                if param.default is param.empty:
-                    required.append(param_name)
-                else:
-                    has_optional_params = True
+        Args:
+            _event: Whether the payload is a request or a response.
+            _payload: The JSON-ready request or response body.
 
-                properties[param_name] = _PropertyDefinition(
-                    type=json_type_mapping.get(param_type, "string"),
-                    description=param_description,
-                )
+        Returns:
+            None
 
-            tools.append(
-                _ToolDefinition(
-                    function=_FunctionDefinition(
-                        name=name,
-                        description=(inspect.getdoc(method) or "").strip(),
-                        parameters=_ParametersDefinition(
-                            properties=properties,
-                            required=required,
-                        ),
-                        strict=not has_optional_params,
-                    ),
-                ),
+        """
+        return
+
+    async def _trace(
+        self,
+        event: Literal["request", "response"],
+        body: BaseModel,
+    ) -> None:
+        is_debug = logger.isEnabledFor(logging.DEBUG)
+        is_traced = type(self).hook_trace is not BaseAgent.hook_trace
+        if not (is_debug or is_traced):
+            return
+        payload = truncate_payload(
+            body.model_dump(by_alias=True, mode="json", exclude_none=True),
+            settings.ironhide_log_max_chars,
+        )
+        if is_debug:
+            logger.debug(
+                "  >>>  %s:  %s",
+                event.capitalize(),
+                json.dumps(payload, indent=4),
             )
-            self.dict_tool[name] = method
-        return tools
+        if is_traced:
+            await self.hook_trace(event, payload)
 
-    async def _call_function(self, name: str, args: dict[str, Any]) -> Any:  # noqa: ANN401
-        selected_tool = self.dict_tool[name]
-        if inspect.iscoroutinefunction(selected_tool):
-            return await selected_tool(**args)
-        return selected_tool(**args)
+    def _span(
+        self,
+        name: str,
+        **attributes: AttributeValue,
+    ) -> AbstractContextManager[Span | None]:
+        """Time a phase of the turn with the agent's ``collector``, if any."""
+        if self.collector is None:
+            return nullcontext()
+        return span(self.collector, name, **self._metric_attributes(), **attributes)
+
+    def _metric_attributes(self) -> dict[str, AttributeValue]:
+        return {
+            "provider": self.provider.value if self.provider else self.provider_url,
+            "model": self.model,
+        }
+
+    def _record_request_metrics(
+        self,
+        request_span: Span | None,
+        request_bytes: int,
+        response_bytes: int,
+        attempts: int,
+    ) -> None:
+        if self.collector is None:
+            return
+        attributes = self._metric_attributes()
+        retries = max(attempts - 1, 0)
+        if request_span:
+            request_span.attributes.update(
+                response_bytes=response_bytes,
+                retries=retries,
+            )
+        self.collector.increment("request_bytes", request_bytes, attributes)
+        self.collector.increment("response_bytes", response_bytes, attributes)
+        if retries:
+            self.collector.increment("retries", retries, attributes)
 
     def _log_request_error(self, data: _Data, response_text: str) -> None:
         logger.exception(
             "  >>>  Request Error:  %s",
-            data.model_dump_json(by_alias=True, exclude_none=True, indent=4),
+            json.dumps(
+                truncate_payload(
+                    data.model_dump(by_alias=True, mode="json", exclude_none=True),
+                    settings.ironhide_log_max_chars,
+                ),
+                indent=4,
+            ),
         )
         try:
             error_response = _ErrorResponse.model_validate_json(response_text)
@@ -476,18 +1025,17 @@ class BaseAgent(ABC):
         except ValidationError:
             logger.debug(response_text)
 
-    async def _api_call(
+    def _build_data(
         self,
         *,
         is_thought: bool = False,
         response_format: type[BaseModel] | None = None,
-    ) -> _Message:
-        instruction_message_list = (
-            [_Message(role=_Role.system, content=self.instructions)]
-            if self.instructions
-            else []
+        messages: Sequence[_Message | _Record] | None = None,
+    ) -> _Data:
+        api_messages: list[_Message | _Record] = (
+            [self._system_message()] if self.instructions else []
         )
-        api_messages = [*instruction_message_list, *self.messages]
+        api_messages.extend(self.messages.records if messages is None else messages)
 
         data = _Data(
             model=self.model,
@@ -497,70 +1045,340 @@ class BaseAgent(ABC):
             tools=self.tools or None,
             tool_choice=None if not self.tools else "none" if is_thought else "auto",
         )
-        logger.debug(
-            "  >>>  Request:  %s",
-            data.model_dump_json(by_alias=True, exclude_none=True, indent=4),
-        )
-        completion: _ChatCompletion
-        retries = 0
-        max_retries = settings.ironhide_max_retries
-        retry_codes = [
-            HTTPStatus.TOO_MANY_REQUESTS,
-            HTTPStatus.INTERNAL_SERVER_ERROR,
-            HTTPStatus.BAD_GATEWAY,
-            HTTPStatus.SERVICE_UNAVAILABLE,
-            HTTPStatus.GATEWAY_TIMEOUT,
-        ]
-        while True:
-            try:
-                response = await self.client.post(
-                    self.provider_url + "chat/completions",
-                    headers=self.headers.model_dump(by_alias=True),
-                    json=data.model_dump(
-                        by_alias=True,
-                        mode="json",
-                        exclude_none=True,
-                    ),
-                    timeout=settings.ironhide_request_timeout,
+        if self.prompt_cache:
+            self._mark_cache_prefix(data)
+        return data
+
+    def _system_message(self) -> _Message:
+        """Return the instructions message, rebuilt only when they change."""
+        if self._system is None or self._system.content != self.instructions:
+            self._system = _Message(role=_Role.system, content=self.instructions)
+        return self._system
+
+    def _mark_cache_prefix(self, data: _Data) -> None:
+        """Annotate ``data`` so the provider caches its longest stable prefix.
+
+        Providers with explicit breakpoints get one after the instructions
+        and one on the last message with content; the others get a
+        ``prompt_cache_key`` derived from the instructions, tools and schema.
+        """
+        if self.cache_control and data.messages:
+            last = len(data.messages) - 1
+            while last > 0 and not _decode(data.messages[last]).content:
+                last -= 1
+            breakpoints = {last, 0} if self.instructions else {last}
+            for index in breakpoints:
+                data.messages[index] = with_cache_control(
+                    _decode(data.messages[index]),
+                    self.cache_control,
                 )
-                response.raise_for_status()
-                completion = _ChatCompletion(**response.json())
-                self._last_completion = completion
-            except ValidationError:
-                if retries < max_retries:
-                    retries += 1
-                    logger.warning(
-                        "Validation failed, retrying (%d/%d)...",
-                        retries,
-                        max_retries,
+        elif self.provider in CACHE_KEY_PROVIDERS:
+            data.prompt_cache_key = prompt_cache_key(
+                self.model,
+                self.instructions,
+                data.tools,
+                data.response_format,
+            )
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        """Share of the prompt tokens served from the provider's prompt cache."""
+        usage = self._calculate_usage()
+        if not usage.prompt_tokens or usage.prompt_tokens_details is None:
+            return 0.0
+        return usage.prompt_tokens_details.cached_tokens / usage.prompt_tokens
+
+    def _record_usage(self, completion: _ChatCompletion) -> None:
+        """Add a completion's usage to the running totals and the ``ledger``."""
+        self._conversation.add_usage(completion.usage)
+        if self.ledger and completion.usage.total_tokens:
+            self.ledger.record(
+                type(self).__name__,
+                completion.model or self.model,
+                completion.usage,
+            )
+
+    def _record_completion(self, completion: _ChatCompletion) -> _Message:
+        self._last_completion = completion
+        self._record_usage(completion)
+        message = completion.choices[0].message
+        self.messages.append(message)
+        return message
+
+    async def _apply_context_policies(self) -> None:
+        """Compact ``self.messages`` with the ``context_policies``, in order.
+
+        Called once per turn, before the new user input is added, so every
+        request of the turn carries its input. Unsaved messages that the
+        compaction drops are saved right away, so the ``store`` keeps the
+        whole conversation.
+        """
+        if not self.context_policies:
+            return
+        budget = self.context_budget
+        if budget is not None and self.instructions:
+            budget -= estimate_tokens(
+                [_Message(role=_Role.system, content=self.instructions)],
+            )
+        messages: Sequence[_Message] = self.messages
+        for policy in self.context_policies:
+            messages = await policy.apply(messages, budget, self._summarize)
+        if messages is not self.messages:
+            dropped = self.messages.compact(messages)
+            if dropped and self.store and self.conversation_id:
+                await self.store.append(self.conversation_id, dropped)
+
+    async def _summarize(self, messages: list[_Message]) -> str:
+        """Ask the model for a summary of ``messages``, without tools.
+
+        The usage is recorded but neither the request nor the summary is
+        added to the history. The summary is saved to the ``store``.
+        """
+        data = self._build_data(messages=messages)
+        data.tools = None
+        data.tool_choice = None
+        completion = await self._request_completion(data)
+        self._record_usage(completion)
+        content = completion.choices[0].message.content
+        summary = content if isinstance(content, str) else ""
+        if self.store and self.conversation_id and summary:
+            await self.store.set_summary(self.conversation_id, summary)
+        return summary
+
+    async def _load_conversation(self) -> None:
+        """Read the stored conversation, once, before its first new message.
+
+        With ``history_turns`` only the last turns are read, preceded by the
+        latest summary if the ``Summarize`` policy wrote one.
+        """
+        if self._conversation.loaded:
+            return
+        self._conversation.loaded = True
+        if self.store is None or self.conversation_id is None:
+            return
+        stored = await self.store.load(self.conversation_id, self.history_turns)
+        if self.history_turns is not None and stored:
+            summary = await self.store.get_summary(self.conversation_id)
+            if summary:
+                message = _Message.prompt(SUMMARY_PREFIX + summary)
+                stored.insert(0, (_Role.user.value, message.to_json(), False))
+        current = [_stored(record) for record in self.messages.records]
+        self.messages = MessageHistory.from_stored([*stored, *current])
+        self.messages.track_appends()
+
+    async def _save_messages(self) -> None:
+        """Append the messages added since the last save to the ``store``.
+
+        Called once a turn is final, so messages removed during the turn,
+        such as rejected structured answers, are never saved.
+        """
+        if self.store is None or self.conversation_id is None:
+            return
+        appended = self.messages.take_appended()
+        if appended:
+            await self.store.append(self.conversation_id, appended)
+
+    def _forget_unsaved(self) -> None:
+        """Keep the messages of a failed turn out of the ``store``.
+
+        They stay in the history, but are not saved with the next turn.
+        """
+        self.messages.take_appended()
+
+    async def _api_call(
+        self,
+        *,
+        is_thought: bool = False,
+        response_format: type[BaseModel] | None = None,
+    ) -> _Message:
+        data = self._build_data(is_thought=is_thought, response_format=response_format)
+        completion = await self._request_completion(data, response_format)
+        return self._record_completion(completion)
+
+    async def _cached_completion(self, key: str) -> _ChatCompletion | None:
+        if not self.completion_cache:
+            return None
+        cached = await self.completion_cache.get(key)
+        if cached is None:
+            return None
+        completion = _ChatCompletion.model_validate_json(cached)
+        completion.usage = _sum_usage([])
+        await self._trace("response", completion)
+        return completion
+
+    async def _send[R](
+        self,
+        attempt: Callable[[], Awaitable[R]],
+        estimated_tokens: int,
+    ) -> R:
+        """Run ``attempt`` with the ``retry_policy`` on one ``rate_limiter`` reservation.
+
+        Retries reuse the reservation, which is given back if every attempt
+        failed.
+        """
+        if self.rate_limiter is None:
+            return await self.retry_policy.run(attempt)
+        await self.rate_limiter.acquire(estimated_tokens)
+        try:
+            return await self.retry_policy.run(attempt)
+        except BaseException:
+            self.rate_limiter.release(estimated_tokens)
+            raise
+
+    async def _request_completion(
+        self,
+        data: _Data,
+        response_format: type[BaseModel] | None = None,
+        *,
+        use_cache: bool = True,
+    ) -> _ChatCompletion:
+        """Send a completion request, through the ``completion_cache`` if set.
+
+        A structured answer is only cached once it validates against
+        ``response_format``, so a rejected answer is never served again.
+        With ``use_cache`` false the cache is neither read nor written.
+        """
+        await self._trace("request", data)
+        body = data.to_json()
+        cache = self.completion_cache if use_cache else None
+        with self._span("request", request_bytes=len(body)) as request_span:
+            key = cache_key(self.provider_url, body) if cache else ""
+            cached = await self._cached_completion(key) if cache else None
+            if cached is not None:
+                if request_span:
+                    request_span.attributes["cache_hit"] = True
+                return cached
+            estimated_tokens = (
+                self.rate_limiter.estimate(len(body)) if self.rate_limiter else 0
+            )
+            response: httpx.Response | None = None
+            attempts = 0
+
+            async def attempt() -> _ChatCompletion:
+                nonlocal response, attempts
+                attempts += 1
+                with self._span("attempt", attempt=attempts) as attempt_span:
+                    response = await self.client.post(
+                        self.provider_url + "chat/completions",
+                        headers=self.headers.model_dump(by_alias=True),
+                        content=body,
+                        timeout=settings.ironhide_request_timeout,
                     )
-                    await sleep(settings.ironhide_retry_delay)
-                    continue
-                self._log_request_error(data, response.text)
+                    if attempt_span:
+                        attempt_span.attributes["status"] = response.status_code
+                    response.raise_for_status()
+                    return _ChatCompletion.model_validate_json(response.content)
+
+            try:
+                completion = await self._send(attempt, estimated_tokens)
+            except ValidationError:
+                self._log_request_error(data, response.text if response else "")
                 raise
             except httpx.HTTPStatusError as exc:
-                if retries < max_retries and exc.response.status_code in retry_codes:
-                    retries += 1
-                    logger.warning(
-                        "Request failed with status %s, retrying (%d/%d)...",
-                        exc.response.status_code,
-                        retries,
-                        max_retries,
-                    )
-                    await sleep(settings.ironhide_retry_delay)
-                    continue
                 self._log_request_error(data, exc.response.text)
                 raise
-            break
-        logger.debug(
-            "  >>>  Response:  %s",
-            completion.model_dump_json(by_alias=True, exclude_none=True, indent=4),
+            finally:
+                self._record_request_metrics(
+                    request_span,
+                    len(body),
+                    len(response.content) if response else 0,
+                    attempts,
+                )
+            if self.rate_limiter:
+                self.rate_limiter.record(
+                    len(body),
+                    estimated_tokens,
+                    completion.usage.prompt_tokens,
+                    completion.usage.total_tokens,
+                )
+            if (
+                cache
+                and response is not None
+                and _is_valid(completion, response_format)
+            ):
+                await cache.set(key, response.content)
+            await self._trace("response", completion)
+            return completion
+
+    async def _api_stream(self, *, is_thought: bool = False) -> AsyncGenerator[str]:
+        """Stream a completion, yielding content deltas as they arrive.
+
+        The deltas are reassembled into a single ``_Message`` (including
+        partial ``tool_calls`` arguments) which is recorded exactly like the
+        result of ``_api_call`` once the stream is exhausted.
+
+        The ``request`` span stays open until the stream is drained, so the
+        generator must be consumed, and closed, within a single context.
+        """
+        data = self._build_data(is_thought=is_thought)
+        data.stream = True
+        data.stream_options = _StreamOptions()
+        await self._trace("request", data)
+        body = data.to_json()
+        estimated_tokens = (
+            self.rate_limiter.estimate(len(body)) if self.rate_limiter else 0
+        )
+        request = self.client.build_request(
+            "POST",
+            self.provider_url + "chat/completions",
+            headers=self.headers.model_dump(by_alias=True),
+            content=body,
+            timeout=settings.ironhide_request_timeout,
         )
-        if completion.usage:
-            self.usage_history.append(completion.usage)
-        message = completion.choices[0].message
-        self.messages.append(message)
-        return message
+
+        attempts = 0
+
+        async def attempt() -> httpx.Response:
+            nonlocal attempts
+            attempts += 1
+            with self._span("attempt", attempt=attempts) as attempt_span:
+                response = await self.client.send(request, stream=True)
+                if attempt_span:
+                    attempt_span.attributes["status"] = response.status_code
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                return response
+
+        chunks: list[_ChatCompletionChunk] = []
+        response: httpx.Response | None = None
+        with self._span(
+            "request",
+            request_bytes=len(body),
+            stream=True,
+        ) as request_span:
+            try:
+                response = await self._send(attempt, estimated_tokens)
+                async for content in _iter_content(response, chunks):
+                    yield content
+                completion = _assemble_chunks(chunks)
+            except httpx.HTTPStatusError as exc:
+                self._log_request_error(data, exc.response.text)
+                raise
+            except BaseException:
+                # ``_send`` already released the reservation if no response
+                # came; a stream cut short gives it back here.
+                if response is not None and self.rate_limiter:
+                    self.rate_limiter.release(estimated_tokens)
+                raise
+            finally:
+                if response is not None:
+                    await response.aclose()
+                self._record_request_metrics(
+                    request_span,
+                    len(body),
+                    response.num_bytes_downloaded if response else 0,
+                    attempts,
+                )
+        if self.rate_limiter:
+            self.rate_limiter.record(
+                len(body),
+                estimated_tokens,
+                completion.usage.prompt_tokens,
+                completion.usage.total_tokens,
+            )
+        await self._trace("response", completion)
+        self._record_completion(completion)
 
     async def hook_augment_user_input(self, input_message: str) -> str:
         """Augment the user input message before processing.
@@ -577,34 +1395,34 @@ class BaseAgent(ABC):
         """
         return input_message
 
-    async def _base_chat(
+    async def _add_user_message(
         self,
         input_message: str | RequestFiles,
-        response_format: type[T] | None = None,
-        files: RequestFiles | None = None,
-    ) -> str:
+        files: ImageFiles | None = None,
+    ) -> str | None:
+        await self._load_conversation()
+        await self._release_images()
+        await self._apply_context_policies()
         if not isinstance(input_message, str):
-            processed_message = await audio_transcription(input_message, self.transcription_api_key)
+            with self._span("transcription"):
+                processed_message = await audio_transcription(
+                    input_message,
+                    self.transcription_api_key,
+                    self._transcription_client,
+                    self.retry_policy,
+                )
             await self.hook_save_transcription(processed_message)
         else:
             processed_message = input_message
 
         if files:
             await self._handle_image_message(processed_message, files)
-        else:
-            self.messages.append(
-                _Message(
-                    role=_Role.user,
-                    content=await self.hook_augment_user_input(processed_message),
-                ),
-            )
-
-        await self._handle_chain_of_thought()
-        message = await self._api_call()
-        message = await self._handle_tool_calls(message, response_format)
-        if response_format:
-            message = await self._api_call(response_format=response_format)
+            return None
+        user_input = await self.hook_augment_user_input(processed_message)
+        self.messages.append(_Message(role=_Role.user, content=user_input))
+        return user_input
 
+    async def _finish_chat(self, *, save: bool = True) -> None:
         self.usage = self._calculate_usage()
 
         completion = _ChatCompletion(
@@ -616,85 +1434,217 @@ class BaseAgent(ABC):
             usage=self.usage,
         )
 
+        if save:
+            await self._save_messages()
         await self.hook_process_usage(completion)
+        if self.ledger and self.ledger.should_flush:
+            await self.ledger.flush()
 
-        content = ""
-        if message:
-            content = str(message.content)
-        return content
+    async def _base_chat(
+        self,
+        input_message: str | RequestFiles,
+        response_format: type[T] | None = None,
+        files: ImageFiles | None = None,
+    ) -> str:
+        with self._span("chat", structured=response_format is not None):
+            user_input = await self._add_user_message(input_message, files)
+            vector = None
+            namespace = f"{self.model}\n{self.instructions}\n{response_format}"
+            # Only the opening message of a conversation has no context the
+            # cached answer could depend on.
+            if (
+                self.semantic_cache
+                and user_input is not None
+                and len(self.messages) == 1
+            ):
+                vector = await self.semantic_cache.embed(user_input)
+                cached = self.semantic_cache.search(vector, namespace)
+                if cached is not None:
+                    self._record_completion(_local_completion(self.model, cached))
+                    await self._finish_chat(save=response_format is None)
+                    return cached
+
+            await self._handle_chain_of_thought()
+            message = await self._api_call()
+            message = await self._handle_tool_calls(message, response_format)
+            if response_format:
+                message = await self._api_call(response_format=response_format)
+
+            # Structured answers are saved once they validate.
+            await self._finish_chat(save=response_format is None)
+
+            content = ""
+            if message:
+                content = str(message.content)
+            if self.semantic_cache and vector is not None:
+                with suppress(ValidationError):
+                    if response_format:
+                        response_format.model_validate_json(content)
+                    self.semantic_cache.add(vector, content, namespace)
+            return content
 
     def _calculate_usage(self) -> _Usage:
-        usage_total: _Usage = _Usage(
-            prompt_tokens=0,
-            completion_tokens=0,
-            total_tokens=0,
-            prompt_tokens_details=_PromptTokensDetails(
-                cached_tokens=0,
-                audio_tokens=0,
-            ),
-            completion_tokens_details=_CompletionTokensDetails(
-                reasoning_tokens=0,
-                audio_tokens=0,
-                accepted_prediction_tokens=0,
-                rejected_prediction_tokens=0,
-            ),
+        return self._conversation.total_usage()
+
+    async def _handle_image_message(
+        self,
+        processed_message: str,
+        files: ImageFiles,
+    ) -> None:
+        content_items: list[_TextContent | _ImageUrlContent] = [
+            _TextContent(text=processed_message),
+        ]
+        for name, content, mime in iter_images(files):
+            if isinstance(content, str):
+                continue
+            url = await asyncio.to_thread(
+                encode_image,
+                name,
+                content,
+                mime,
+                self.image_max_size,
+            )
+            image = _ImageUrlContent(image_url={"url": url})
+            image._name = name  # noqa: SLF001
+            content_items.append(image)
+        self.messages.append(
+            _Message(role=_Role.user, content=content_items),
         )
-        for usage in self.usage_history:
-            usage_total.prompt_tokens += usage.prompt_tokens
-            usage_total.completion_tokens += usage.completion_tokens
-            usage_total.total_tokens += usage.total_tokens
 
-            if usage.prompt_tokens_details and usage_total.prompt_tokens_details:
-                usage_total.prompt_tokens_details.cached_tokens += (
-                    usage.prompt_tokens_details.cached_tokens
-                )
-                usage_total.prompt_tokens_details.audio_tokens += (
-                    usage.prompt_tokens_details.audio_tokens
-                )
+    async def hook_offload_image(self, _name: str, _url: str) -> str | None:
+        """Offload an image that is no longer kept inline in the history.
 
-            if (
-                usage.completion_tokens_details
-                and usage_total.completion_tokens_details
-            ):
-                usage_total.completion_tokens_details.reasoning_tokens += (
-                    usage.completion_tokens_details.reasoning_tokens
-                )
-                usage_total.completion_tokens_details.audio_tokens += (
-                    usage.completion_tokens_details.audio_tokens
-                )
-                usage_total.completion_tokens_details.accepted_prediction_tokens += (
-                    usage.completion_tokens_details.accepted_prediction_tokens
+        This method can be overridden by subclasses to upload the image
+        (e.g., to object storage) and return a URL the provider can fetch
+        instead of the base64 payload.
+
+        Args:
+            _name: The file name of the image, or an empty string if it is
+                unknown because the message was loaded from the ``store``.
+            _url: The ``data:`` URL of the image.
+
+        Returns:
+            The URL referencing the image, or None to replace the image with
+            a text placeholder.
+
+        """
+        return None
+
+    async def _release_images(self) -> None:
+        """Offload the images of turns older than ``image_retention`` turns."""
+        if self.image_retention is None:
+            return
+        starts = self.messages.turn_starts()
+        for index in starts[: max(len(starts) - self.image_retention, 0)]:
+            if not self.messages.has_inline_image(index):
+                continue
+            message = self.messages[index]
+            if not isinstance(message.content, list):
+                continue
+            parts: list[_TextContent | _ImageUrlContent] = []
+            for part in message.content:
+                url = (
+                    part.image_url["url"] if isinstance(part, _ImageUrlContent) else ""
                 )
-                usage_total.completion_tokens_details.rejected_prediction_tokens += (
-                    usage.completion_tokens_details.rejected_prediction_tokens
+                if not url.startswith("data:"):
+                    parts.append(part)
+                    continue
+                name = part._name  # type: ignore[union-attr]  # noqa: SLF001
+                reference = await self.hook_offload_image(name, url)
+                parts.append(
+                    _ImageUrlContent(image_url={"url": reference})
+                    if reference
+                    else _TextContent(
+                        text=f"[image {name} omitted]" if name else "[image omitted]",
+                    ),
                 )
-        return usage_total
+            message.content = parts
+            self.messages[index] = message
 
-    async def _handle_image_message(
+    async def _handle_chain_of_thought(self) -> None:
+        if not self.chain_of_thought:
+            return
+        steps = resolve_thoughts(
+            self.chain_of_thought,
+            parallel=self.parallel_thoughts,
+        )
+        with self._span("chain_of_thought", steps=len(self.chain_of_thought)):
+            if steps is None:
+                for thought in self.chain_of_thought:
+                    prompt = thought.prompt if isinstance(thought, Thought) else thought
+                    self.messages.append(_Message.prompt(prompt))
+                    await self._api_call(is_thought=True)
+            else:
+                await self._run_thought_graph(steps)
+        self.messages.append(_Message.prompt(""))
+
+    async def _run_thought_graph(
         self,
-        processed_message: str,
-        files: RequestFiles,
+        steps: list[tuple[str, frozenset[int]]],
     ) -> None:
-        name, file_bytes, mime = files["file"]  # type: ignore[misc, call-overload]
-        if isinstance(file_bytes, Buffer):
-            base64_image = base64.b64encode(file_bytes).decode("utf-8")
-            content_items: list[_TextContent | _ImageUrlContent] = [
-                _TextContent(text=processed_message),
-                _ImageUrlContent(
-                    image_url={"url": f"data:{mime!s};base64,{base64_image}"},
+        """Request every thought as soon as the steps it depends on are answered.
+
+        Each step sees the conversation as it was before the chain plus the
+        steps it depends on. The answers are appended in declared order.
+        """
+        snapshot = list(self.messages.records)
+        prompts = [_Message.prompt(prompt) for prompt, _ in steps]
+        tasks: list[asyncio.Future[_Message]] = []
+
+        async def think(index: int) -> _Message:
+            dependencies = sorted(steps[index][1])
+            await asyncio.gather(*(tasks[dependency] for dependency in dependencies))
+            messages: list[_Message | _Record] = list(snapshot)
+            for dependency in dependencies:
+                messages.extend((prompts[dependency], tasks[dependency].result()))
+            messages.append(prompts[index])
+            data = self._build_data(is_thought=True, messages=messages)
+            completion = await self._request_completion(data)
+            self._last_completion = completion
+            self._record_usage(completion)
+            return completion.choices[0].message
+
+        tasks.extend(asyncio.ensure_future(think(index)) for index in range(len(steps)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        for prompt, task in zip(prompts, tasks, strict=True):
+            self.messages.extend((prompt, task.result()))
+
+    async def _execute_tool_calls(self, tool_calls: list[_ToolCall]) -> None:
+        """Run the tool calls of a message concurrently.
+
+        Coroutine tools run as tasks and synchronous tools in a shared thread
+        pool, at most ``tool_concurrency`` at a time per conversation. The ``tool``
+        messages are appended in the order of ``tool_calls``.
+        """
+        tasks = [
+            asyncio.ensure_future(
+                self._call_function(
+                    tool_call.function.name,
+                    json.loads(tool_call.function.arguments),
                 ),
-            ]
+            )
+            for tool_call in tool_calls
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        for tool_call, result in zip(tool_calls, results, strict=True):
             self.messages.append(
-                _Message(role=_Role.user, content=content_items),
+                _Message(
+                    role=_Role.tool,
+                    content=str(result),
+                    tool_call_id=tool_call.id,
+                ),
             )
 
-    async def _handle_chain_of_thought(self) -> None:
-        if self.chain_of_thought:
-            for thought in self.chain_of_thought:
-                self.messages.append(_Message(role=_Role.user, content=thought))
-                await self._api_call(is_thought=True)
-            self.messages.append(_Message(role=_Role.user, content=""))
-
     async def _handle_tool_calls(
         self,
         message: _Message,
@@ -702,18 +1652,7 @@ class BaseAgent(ABC):
     ) -> _Message:
         tool_calls = message.tool_calls
         while tool_calls:
-            for tool_call in tool_calls:
-                name = tool_call.function.name
-                args = json.loads(tool_call.function.arguments)
-                id_ = tool_call.id
-                result = await self._call_function(name, args)
-                self.messages.append(
-                    _Message(
-                        role=_Role.tool,
-                        content=str(result),
-                        tool_call_id=id_,
-                    ),
-                )
+            await self._execute_tool_calls(tool_calls)
             message = await self._api_call()
             tool_calls = message.tool_calls
 
@@ -725,25 +1664,103 @@ class BaseAgent(ABC):
     async def chat(
         self,
         input_message: str | RequestFiles,
-        files: RequestFiles | None = None,
+        files: ImageFiles | None = None,
+        conversation: Conversation | None = None,
     ) -> str:
         """Handle a chat interaction, optionally processing audio or image files.
 
         Args:
             input_message: The user's input message, which can be text or audio files.
             files: Optional image files to be included in the chat.
+            conversation: The conversation to continue. Defaults to the
+                agent's own conversation.
 
         Returns:
             The assistant's response as a string.
 
         """
-        return await self._base_chat(input_message=input_message, files=files)
+        with self._use_conversation(conversation):
+            try:
+                return await self._base_chat(input_message=input_message, files=files)
+            except BaseException:
+                self._forget_unsaved()
+                raise
+
+    async def stream_chat(
+        self,
+        input_message: str | RequestFiles,
+        files: ImageFiles | None = None,
+        conversation: Conversation | None = None,
+    ) -> AsyncIterator[str]:
+        """Handle a chat interaction, yielding the response as it is generated.
+
+        Behaves like ``chat`` but requests a server-sent-event stream from the
+        provider and yields content deltas as soon as they arrive. Tool calls
+        are reassembled from the stream, executed, and the conversation is
+        resumed until the model produces a final answer. The complete message
+        is appended to ``messages`` and its usage to ``usage_history``.
+
+        Args:
+            input_message: The user's input message, which can be text or audio files.
+            files: Optional image files to be included in the chat.
+            conversation: The conversation to continue. Defaults to the
+                agent's own conversation.
+
+        Yields:
+            Fragments of the assistant's response as strings.
+
+        """
+        # The turn runs in its own task, so the conversation it binds never
+        # leaks into the caller's context between tokens. Each token is
+        # handed over only once the previous one was consumed.
+        tokens: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def run() -> None:
+            with self._use_conversation(conversation):
+                async with aclosing(self._stream_chat(input_message, files)) as stream:
+                    async for token in stream:
+                        tokens.put_nowait(token)
+                        await tokens.join()
+
+        task = asyncio.create_task(run())
+        task.add_done_callback(lambda _: tokens.put_nowait(None))
+        try:
+            while (token := await tokens.get()) is not None:
+                yield token
+                tokens.task_done()
+            await task
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
+
+    async def _stream_chat(
+        self,
+        input_message: str | RequestFiles,
+        files: ImageFiles | None,
+    ) -> AsyncGenerator[str]:
+        with self._span("chat", structured=False, stream=True):
+            try:
+                await self._add_user_message(input_message, files)
+                await self._handle_chain_of_thought()
+                while True:
+                    async with aclosing(self._api_stream()) as stream:
+                        async for token in stream:
+                            yield token
+                    tool_calls = self.messages[-1].tool_calls
+                    if not tool_calls:
+                        break
+                    await self._execute_tool_calls(tool_calls)
+            except BaseException:
+                self._forget_unsaved()
+                raise
+            await self._finish_chat()
 
     async def structured_chat(
         self,
         input_message: str | RequestFiles,
         response_format: type[T],
-        files: RequestFiles | None = None,
+        files: ImageFiles | None = None,
+        conversation: Conversation | None = None,
     ) -> T:
         """Handle a chat interaction with a structured response.
 
@@ -751,6 +1768,10 @@ class BaseAgent(ABC):
         The response is validated using ``response_format.model_validate_json``.
         If validation fails, the call is automatically retried up to
         ``ironhide_max_retries`` times before raising the ``ValidationError``.
+        With the default ``structured_repair`` of ``"replay"`` the whole chat
+        is replayed. ``"reformat"`` and ``"feedback"`` first try to repair the
+        JSON locally and then only re-ask for the final answer, the latter
+        telling the model why the previous answer was rejected.
 
         Args:
             input_message: The user's input message, which can be text or audio
@@ -758,6 +1779,8 @@ class BaseAgent(ABC):
             response_format: The Pydantic model class used to validate and parse
                 the model's response.
             files: Optional image files to be included in the message.
+            conversation: The conversation to continue. Defaults to the
+                agent's own conversation.
 
         Returns:
             An instance of ``response_format`` populated with the model's response.
@@ -766,27 +1789,177 @@ class BaseAgent(ABC):
             ValidationError: If the response cannot be parsed after all retries.
 
         """
+        with self._use_conversation(conversation):
+            try:
+                answer = await self._structured_chat(
+                    input_message,
+                    response_format,
+                    files,
+                )
+            except BaseException:
+                self._forget_unsaved()
+                raise
+            await self._save_messages()
+            return answer
+
+    async def _structured_chat(
+        self,
+        input_message: str | RequestFiles,
+        response_format: type[T],
+        files: ImageFiles | None,
+    ) -> T:
         max_retries = settings.ironhide_max_retries
         retries = 0
+        content = await self._base_chat(
+            input_message=input_message,
+            files=files,
+            response_format=response_format,
+        )
         while True:
-            content = await self._base_chat(
-                input_message=input_message,
-                files=files,
-                response_format=response_format,
-            )
             try:
                 return response_format.model_validate_json(content)
-            except ValidationError:
-                if retries < max_retries:
-                    retries += 1
-                    logger.warning(
-                        "Validation failed, retrying (%d/%d)...",
-                        retries,
-                        max_retries,
+            except ValidationError as exc:
+                if self.structured_repair != "replay":
+                    with suppress(ValidationError):
+                        return response_format.model_validate_json(repair_json(content))
+                if retries >= max_retries:
+                    raise
+                retries += 1
+                if self.collector:
+                    self.collector.increment(
+                        "validation_retries",
+                        attributes=self._metric_attributes(),
                     )
-                    continue
-                raise
+                logger.warning(
+                    "Validation failed, retrying (%d/%d)...",
+                    retries,
+                    max_retries,
+                )
+                if self.structured_repair == "replay":
+                    content = await self._base_chat(
+                        input_message=input_message,
+                        files=files,
+                        response_format=response_format,
+                    )
+                else:
+                    content = await self._reformat(response_format, exc)
 
+    async def _reformat(
+        self,
+        response_format: type[BaseModel],
+        error: ValidationError,
+    ) -> str:
+        """Ask again for the final answer only, keeping the rest of the turn.
+
+        The request offers the tools with ``tool_choice="none"`` and
+        bypasses the ``completion_cache``: in ``"reformat"`` mode it repeats
+        the rejected request byte for byte, so the cache would only hand the
+        rejected answer back. The rejected answer, and the feedback about
+        it, are removed from the history once the new answer is recorded.
+        They are counted back from the end, so a change to older messages
+        cannot shift them.
+        """
+        self._discard_tool_calls()
+        rejected = 1
+        if self.structured_repair == "feedback":
+            problems = "; ".join(
+                f"{'.'.join(map(str, problem['loc'])) or 'answer'}: {problem['msg']}"
+                for problem in error.errors()
+            )
+            self.messages.append(
+                _Message.prompt(
+                    settings.ironhide_repair_prompt.format(errors=problems),
+                ),
+            )
+            rejected += 1
+        else:
+            self.messages.pop()
+            rejected -= 1
+        data = self._build_data(response_format=response_format)
+        if data.tools:
+            data.tool_choice = "none"
+        self._record_completion(
+            await self._request_completion(data, response_format, use_cache=False),
+        )
+        self._discard_tool_calls()
+        del self.messages[-1 - rejected : -1]
+        await self._finish_chat(save=False)
+        return str(self.messages[-1].content or "")
+
+    def _discard_tool_calls(self) -> None:
+        """Replace a last answer calling tools with an empty, failed answer.
+
+        Tool calls are not a structured answer, and left in the history
+        without their results they would make the provider reject the
+        next request.
+        """
+        if self.messages[-1].tool_calls:
+            self.messages[-1] = _Message(role=_Role.assistant, content="")
+
+    async def batch_structured_chat(
+        self,
+        input_messages: Sequence[str],
+        response_format: type[T],
+    ) -> list[T | BatchError]:
+        """Answer many independent messages through the provider's batch API.
+
+        Each input is sent as a single-turn request on top of the current
+        ``messages`` history, with the agent's instructions and
+        ``response_format``, but without tools or chain of thought. The
+        requests are uploaded as one JSONL batch, polled until completion,
+        and their usage is added to ``usage_history``. The history itself is
+        left untouched.
+
+        Args:
+            input_messages: The user messages to process.
+            response_format: The Pydantic model class used to validate each answer.
+
+        Returns:
+            For each input, in order, the validated answer or a ``BatchError``.
+
+        Raises:
+            BatchError: If the whole batch failed, expired or was cancelled.
+            TimeoutError: If the batch did not finish within ``ironhide_batch_max_wait``.
+
+        """
+        bodies: list[bytes] = []
+        for input_message in input_messages:
+            user_message = _Message(
+                role=_Role.user,
+                content=await self.hook_augment_user_input(input_message),
+            )
+            data = self._build_data(
+                response_format=response_format,
+                messages=[*self.messages.records, user_message],
+            )
+            data.tools = None
+            data.tool_choice = None
+            bodies.append(data.to_json())
+
+        results: list[T | BatchError] = []
+        outputs = await run_batch(
+            self.client,
+            self.provider_url,
+            self.api_key.get_secret_value(),
+            bodies,
+            retry_policy=self.retry_policy,
+        )
+        for index, output in enumerate(outputs):
+            if isinstance(output, BatchError):
+                results.append(output)
+                continue
+            try:
+                completion = _ChatCompletion.model_validate(output)
+                self._record_usage(completion)
+                results.append(
+                    response_format.model_validate_json(
+                        str(completion.choices[0].message.content),
+                    ),
+                )
+            except ValidationError as exc:
+                results.append(BatchError(str(index), str(exc)))
+        self.usage = self._calculate_usage()
+        return results
 
 
 F = TypeVar("F", bound=Callable[..., Any])
@@ -796,3 +1969,211 @@ def tool(func: F) -> F:
     """Mark a method as a tool that can be called by the AI model."""
     func.is_tool = True  # type: ignore[attr-defined]
     return func
+
+
+class RunResult[R](BaseModel):
+    """Outcome of one conversation started by ``run_many``.
+
+    Attributes:
+        index: Position of the input in the iterable given to ``run_many``.
+        input_message: The input message.
+        output: The agent's answer, or None if the conversation failed.
+        error: The exception raised by the conversation, if any.
+        usage: Tokens consumed by the conversation, including failed attempts.
+
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    input_message: str
+    output: R | None = None
+    error: Exception | None = None
+    usage: _Usage
+
+
+class RunMany[R]:
+    """Async iterator over the results of many concurrent conversations.
+
+    At most ``concurrency`` conversations run at a time and inputs are only
+    pulled from the iterable when a slot is free, so large or lazy inputs are
+    never materialized. With ``ordered`` results are yielded in input order,
+    otherwise as soon as they complete. ``usage`` holds the running total of
+    all results yielded so far.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], BaseAgent],
+        input_messages: Iterable[str],
+        response_format: type[BaseModel] | None,
+        concurrency: int,
+        *,
+        ordered: bool,
+    ) -> None:
+        """Initialize the run; nothing starts until the iterator is consumed.
+
+        Args:
+            agent_factory: Callable returning a fresh agent for each input.
+            input_messages: The user messages to process.
+            response_format: Optional Pydantic model for ``structured_chat``.
+            concurrency: Maximum number of conversations in flight.
+            ordered: Whether to yield results in input order.
+
+        """
+        self.agent_factory = agent_factory
+        self.input_messages = input_messages
+        self.response_format = response_format
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.usage = _sum_usage([])
+
+    def __aiter__(self) -> AsyncIterator[RunResult[R]]:
+        """Start the conversations and iterate over their results."""
+        return self._run()
+
+    async def collect(self) -> list[RunResult[R]]:
+        """Run every conversation and return the results.
+
+        Returns:
+            The results, in input order if ``ordered`` was set.
+
+        """
+        return [result async for result in self]
+
+    async def _run_one(self, index: int, input_message: str) -> RunResult[R]:
+        agent: BaseAgent | None = None
+        try:
+            agent = self.agent_factory()
+            if self.response_format:
+                output: Any = await agent.structured_chat(
+                    input_message,
+                    self.response_format,
+                )
+            else:
+                output = await agent.chat(input_message)
+        except Exception as exc:  # noqa: BLE001
+            return RunResult(
+                index=index,
+                input_message=input_message,
+                error=exc,
+                usage=(
+                    agent._calculate_usage()  # noqa: SLF001
+                    if agent
+                    else _sum_usage([])
+                ),
+            )
+        finally:
+            if agent is not None:
+                await agent.aclose()
+        return RunResult(
+            index=index,
+            input_message=input_message,
+            output=output,
+            usage=agent._calculate_usage(),  # noqa: SLF001
+        )
+
+    async def _run(self) -> AsyncIterator[RunResult[R]]:
+        inputs = enumerate(self.input_messages)
+        pending: set[asyncio.Task[RunResult[R]]] = set()
+        completed: dict[int, RunResult[R]] = {}
+        next_index = 0
+        exhausted = False
+        try:
+            while True:
+                while (
+                    not exhausted
+                    and len(pending) < self.concurrency
+                    and len(completed) < self.concurrency
+                ):
+                    try:
+                        index, input_message = next(inputs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(
+                        asyncio.create_task(self._run_one(index, input_message)),
+                    )
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    result = task.result()
+                    if not self.ordered:
+                        _add_usage(self.usage, result.usage)
+                        yield result
+                        continue
+                    completed[result.index] = result
+                while next_index in completed:
+                    result = completed.pop(next_index)
+                    _add_usage(self.usage, result.usage)
+                    yield result
+                    next_index += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+@overload
+def run_many(
+    agent_factory: Callable[[], BaseAgent],
+    input_messages: Iterable[str],
+    response_format: None = None,
+    *,
+    concurrency: int | None = None,
+    ordered: bool = True,
+) -> RunMany[str]: ...
+
+
+@overload
+def run_many[M: BaseModel](
+    agent_factory: Callable[[], BaseAgent],
+    input_messages: Iterable[str],
+    response_format: type[M],
+    *,
+    concurrency: int | None = None,
+    ordered: bool = True,
+) -> RunMany[M]: ...
+
+
+def run_many(
+    agent_factory: Callable[[], BaseAgent],
+    input_messages: Iterable[str],
+    response_format: type[BaseModel] | None = None,
+    *,
+    concurrency: int | None = None,
+    ordered: bool = True,
+) -> RunMany[Any]:
+    """Run one conversation per input message with bounded concurrency.
+
+    Each input gets its own agent from ``agent_factory`` and goes through
+    ``chat``, or ``structured_chat`` when a ``response_format`` is given.
+    Errors are captured per item instead of aborting the run. Agents share
+    the pooled HTTP clients and rate limiters of their provider.
+
+    Example:
+        async for result in run_many(MyAgent, documents, Summary, concurrency=32):
+            ...
+
+    Args:
+        agent_factory: Callable returning a fresh agent for each input.
+        input_messages: The user messages to process, consumed lazily.
+        response_format: Optional Pydantic model to validate each answer against.
+        concurrency: Maximum number of conversations in flight. Defaults to
+            ``ironhide_run_concurrency``.
+        ordered: Yield results in input order instead of as they complete.
+
+    Returns:
+        An async iterator of ``RunResult`` exposing the aggregate ``usage``.
+
+    """
+    return RunMany(
+        agent_factory,
+        input_messages,
+        response_format,
+        concurrency or settings.ironhide_run_concurrency,
+        ordered=ordered,
+    )
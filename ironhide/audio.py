@@ -0,0 +1,275 @@
+"""Speech-to-text through the OpenAI ``audio/transcriptions`` endpoint.
+
+Long PCM WAV recordings are split at the quietest moment near each chunk
+boundary and the chunks are transcribed concurrently.
+"""
+
+import asyncio
+import io
+import sys
+import wave
+from array import array
+from collections.abc import AsyncIterator, Iterator, Mapping
+from itertools import count
+from pathlib import Path
+from typing import IO
+
+import httpx
+from httpx._types import RequestFiles
+from pydantic import SecretStr
+
+from ironhide.retry import RetryPolicy
+from ironhide.settings import settings
+from ironhide.transport import get_client
+from ironhide.utils import PROVIDER_URLS, Provider
+
+type AudioSource = Path | IO[bytes] | bytes
+
+_WAV_MAGIC = (b"RIFF", b"WAVE")
+_SILENCE_WINDOW_SECONDS = 0.02
+_SILENCE_SAMPLE_STRIDE = 4
+_PCM16_WIDTH = 2
+
+
+async def _transcribe(
+    files: RequestFiles,
+    api_key: SecretStr,
+    client: httpx.AsyncClient | None,
+    retry_policy: RetryPolicy | None,
+) -> str:
+    base_url = PROVIDER_URLS[Provider.openai]
+    transcription_headers = {"Authorization": f"Bearer {api_key.get_secret_value()}"}
+    data = {"model": settings.ironhide_transcription_model}
+
+    async def attempt() -> httpx.Response:
+        response = await (client or get_client(base_url)).post(
+            base_url + "audio/transcriptions",
+            headers=transcription_headers,
+            files=files,
+            data=data,
+            timeout=settings.ironhide_request_timeout,
+        )
+        response.raise_for_status()
+        return response
+
+    transcription_response = await (retry_policy or RetryPolicy()).run(attempt)
+    return str(transcription_response.json().get("text", ""))
+
+
+def _is_wav(stream: IO[bytes]) -> bool:
+    """Tell whether ``stream`` is a WAV file ``iter_wav_chunks`` can split.
+
+    Only PCM WAV files qualify: ``wave`` rejects other encodings, such as
+    IEEE float, which are uploaded whole instead. The stream is rewound.
+    """
+    if not stream.seekable():
+        return False
+    position = stream.tell()
+    try:
+        header = stream.read(12)
+        if (header[:4], header[8:12]) != _WAV_MAGIC:
+            return False
+        stream.seek(position)
+        with wave.open(stream, "rb") as reader:
+            reader.getparams()
+    except (wave.Error, EOFError):
+        return False
+    finally:
+        stream.seek(position)
+    return True
+
+
+def _quietest_cut(frames: bytes, params: wave._wave_params, search_frames: int) -> int:
+    """Byte offset, in the last ``search_frames`` of ``frames``, of the quietest window."""
+    frame_size = params.nchannels * params.sampwidth
+    window_frames = max(int(params.framerate * _SILENCE_WINDOW_SECONDS), 1)
+    start = len(frames) - search_frames * frame_size
+    if params.sampwidth != _PCM16_WIDTH:
+        return len(frames)
+    samples = array("h", frames[start:])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    window = window_frames * params.nchannels
+    best_offset, best_energy = len(samples), None
+    for offset in range(0, len(samples) - window + 1, window):
+        energy = sum(
+            map(abs, samples[offset : offset + window : _SILENCE_SAMPLE_STRIDE]),
+        )
+        if best_energy is None or energy < best_energy:
+            best_offset, best_energy = offset + window // 2, energy
+    return start + best_offset // params.nchannels * frame_size
+
+
+def _encode_wav(frames: bytes, params: wave._wave_params) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setparams(params)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+
+def iter_wav_chunks(
+    stream: IO[bytes],
+    chunk_seconds: float | None = None,
+    silence_window: float | None = None,
+) -> Iterator[bytes]:
+    """Read a PCM WAV stream as a sequence of standalone WAV files.
+
+    Only one chunk is held in memory at a time. Each chunk is cut at the
+    quietest moment of its last ``silence_window`` seconds, so words are
+    rarely split between chunks.
+
+    Args:
+        stream: Binary stream positioned at the start of the WAV file.
+        chunk_seconds: Maximum chunk duration. Defaults to
+            ``ironhide_transcription_chunk_seconds``.
+        silence_window: Seconds searched for a pause before each cut.
+            Defaults to ``ironhide_transcription_silence_window``.
+
+    Yields:
+        The encoded WAV chunks, in order.
+
+    """
+    with wave.open(stream, "rb") as reader:
+        params = reader.getparams()
+        frame_size = params.nchannels * params.sampwidth
+        max_frames = min(
+            int(
+                (chunk_seconds or settings.ironhide_transcription_chunk_seconds)
+                * params.framerate,
+            ),
+            settings.ironhide_transcription_max_chunk_bytes // frame_size,
+        )
+        search_frames = min(
+            int(
+                (silence_window or settings.ironhide_transcription_silence_window)
+                * params.framerate,
+            ),
+            max_frames // 2,
+        )
+        carry = b""
+        while True:
+            frames = carry + reader.readframes(max_frames - len(carry) // frame_size)
+            if len(frames) < max_frames * frame_size:
+                if frames:
+                    yield _encode_wav(frames, params)
+                return
+            cut = _quietest_cut(frames, params, search_frames)
+            yield _encode_wav(frames[:cut], params)
+            carry = frames[cut:]
+
+
+async def stream_transcription(
+    audio: AudioSource,
+    api_key: SecretStr,
+    client: httpx.AsyncClient | None = None,
+    retry_policy: RetryPolicy | None = None,
+    concurrency: int | None = None,
+) -> AsyncIterator[str]:
+    """Transcribe audio chunk by chunk, yielding the text of each chunk in order.
+
+    PCM WAV audio is split with ``iter_wav_chunks`` and at most
+    ``concurrency`` chunks are read and in flight at once. Other formats
+    are uploaded whole, streamed from the source.
+
+    Args:
+        audio: A file path, a binary file object or the raw bytes.
+        api_key: OpenAI API key for authentication.
+        client: Optional HTTP client. Defaults to the pooled OpenAI client.
+        retry_policy: Optional retry policy. Defaults to one built from settings.
+        concurrency: Maximum concurrent requests. Defaults to
+            ``ironhide_transcription_concurrency``.
+
+    Yields:
+        The transcription of each chunk.
+
+    Raises:
+        httpx.HTTPStatusError: If a request still fails after all retries.
+
+    """
+    if isinstance(audio, Path):
+        with audio.open("rb") as file:
+            async for text in stream_transcription(
+                file,
+                api_key,
+                client,
+                retry_policy,
+                concurrency,
+            ):
+                yield text
+        return
+    stream = io.BytesIO(audio) if isinstance(audio, bytes) else audio
+    name = Path(str(getattr(stream, "name", "audio"))).name
+    if not _is_wav(stream):
+        yield await _transcribe({"file": (name, stream)}, api_key, client, retry_policy)
+        return
+
+    semaphore = asyncio.Semaphore(
+        concurrency or settings.ironhide_transcription_concurrency,
+    )
+
+    async def transcribe_chunk(index: int, chunk: bytes) -> str:
+        try:
+            files = {"file": (f"{Path(name).stem}-{index}.wav", chunk, "audio/wav")}
+            return await _transcribe(files, api_key, client, retry_policy)
+        finally:
+            semaphore.release()
+
+    chunks = iter_wav_chunks(stream)
+    tasks: list[asyncio.Task[str]] = []
+    try:
+        for index in count():
+            await semaphore.acquire()
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            tasks.append(asyncio.create_task(transcribe_chunk(index, chunk)))
+            while tasks and tasks[0].done():
+                yield tasks.pop(0).result()
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def audio_transcription(
+    files: RequestFiles,
+    api_key: SecretStr,
+    client: httpx.AsyncClient | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> str:
+    """Transcribes audio files to text using the OpenAI API.
+
+    A single PCM WAV file, given as bytes or as a seekable file object, is
+    transcribed in chunks with ``stream_transcription``.
+
+    Args:
+        files: RequestFiles object containing the audio file to transcribe.
+        api_key: OpenAI API key for authentication.
+        client: Optional HTTP client. Defaults to the pooled OpenAI client.
+        retry_policy: Optional retry policy. Defaults to one built from settings.
+
+    Returns:
+        The transcribed text as a string.
+
+    Raises:
+        httpx.HTTPStatusError: If the request still fails after all retries.
+
+    """
+    entries = list(files.items()) if isinstance(files, Mapping) else list(files)
+    content = entries[0][1][1] if isinstance(entries[0][1], tuple) else entries[0][1]
+    if len(entries) == 1 and not isinstance(content, str):
+        stream = io.BytesIO(content) if isinstance(content, bytes) else content
+        if _is_wav(stream):
+            texts = [
+                text.strip()
+                async for text in stream_transcription(
+                    stream,
+                    api_key,
+                    client,
+                    retry_policy,
+                )
+            ]
+            return " ".join(text for text in texts if text)
+    return await _transcribe(files, api_key, client, retry_policy)
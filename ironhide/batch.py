@@ -0,0 +1,176 @@
+"""Client for OpenAI-compatible batch endpoints (``files`` and ``batches``)."""
+
+import json
+import logging
+import time
+from asyncio import sleep
+from typing import Any, Literal
+
+import httpx
+from pydantic import BaseModel
+
+from ironhide.retry import RetryPolicy
+from ironhide.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchError(Exception):
+    """A request of a batch that did not produce a usable result."""
+
+    def __init__(self, custom_id: str, message: str) -> None:
+        """Initialize the error.
+
+        Args:
+            custom_id: Identifier of the failed request inside the batch.
+            message: Description of the failure.
+
+        """
+        super().__init__(f"{custom_id}: {message}")
+        self.custom_id = custom_id
+        self.message = message
+
+
+class _FileObject(BaseModel):
+    id: str
+
+
+class _Batch(BaseModel):
+    id: str
+    status: str
+    output_file_id: str | None = None
+    error_file_id: str | None = None
+    errors: dict[str, Any] | None = None
+
+
+class _BatchResponse(BaseModel):
+    status_code: int
+    body: dict[str, Any]
+
+
+class _BatchOutput(BaseModel):
+    custom_id: str
+    response: _BatchResponse | None = None
+    error: dict[str, Any] | None = None
+
+
+async def run_batch(
+    client: httpx.AsyncClient,
+    base_url: str,
+    api_key: str,
+    bodies: list[bytes],
+    *,
+    retry_policy: RetryPolicy | None = None,
+    poll_interval: float | None = None,
+    max_wait: float | None = None,
+) -> list[dict[str, Any] | BatchError]:
+    """Submit chat completion bodies as one batch and wait for the results.
+
+    Args:
+        client: HTTP client used for every call.
+        base_url: Provider URL, e.g. ``https://api.openai.com/v1/``.
+        api_key: Provider API key.
+        bodies: Serialized ``chat/completions`` request bodies.
+        retry_policy: Policy applied to each HTTP call. Defaults to settings.
+        poll_interval: Seconds between status checks. Defaults to settings.
+        max_wait: Seconds to wait before cancelling the batch. Defaults to settings.
+
+    Returns:
+        For each body, in order, the completion as a dict or a ``BatchError``.
+
+    Raises:
+        BatchError: If the batch as a whole failed, expired or was cancelled.
+        TimeoutError: If the batch did not finish within ``max_wait``.
+
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    poll_interval = poll_interval or settings.ironhide_batch_poll_interval
+    max_wait = max_wait or settings.ironhide_batch_max_wait
+    headers = {"Authorization": f"Bearer {api_key}"}
+    endpoint = httpx.URL(base_url).path + "chat/completions"
+
+    async def request(
+        method: Literal["GET", "POST"],
+        path: str,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> httpx.Response:
+        async def attempt() -> httpx.Response:
+            response = await client.request(
+                method,
+                base_url + path,
+                headers=headers,
+                timeout=settings.ironhide_request_timeout,
+                **kwargs,
+            )
+            response.raise_for_status()
+            return response
+
+        return await retry_policy.run(attempt)
+
+    header = json.dumps({"method": "POST", "url": endpoint})[1:-1].encode()
+    lines = [
+        b'{"custom_id":"%d",%s,"body":%s}' % (index, header, body)
+        for index, body in enumerate(bodies)
+    ]
+    upload = await request(
+        "POST",
+        "files",
+        files={"file": ("batch.jsonl", b"\n".join(lines), "application/jsonl")},
+        data={"purpose": "batch"},
+    )
+    input_file = _FileObject.model_validate_json(upload.content)
+    created = await request(
+        "POST",
+        "batches",
+        json={
+            "input_file_id": input_file.id,
+            "endpoint": endpoint,
+            "completion_window": settings.ironhide_batch_completion_window,
+        },
+    )
+    batch = _Batch.model_validate_json(created.content)
+    logger.info("Batch %s submitted with %d requests", batch.id, len(bodies))
+
+    start = time.monotonic()
+    while batch.status not in _FINAL_STATUSES:
+        if max_wait is not None and time.monotonic() - start > max_wait:
+            await request("POST", f"batches/{batch.id}/cancel")
+            message = f"Batch {batch.id} did not finish within {max_wait}s"
+            raise TimeoutError(message)
+        await sleep(poll_interval)
+        polled = await request("GET", f"batches/{batch.id}")
+        batch = _Batch.model_validate_json(polled.content)
+    if batch.status != "completed":
+        raise BatchError(batch.id, f"batch {batch.status}: {batch.errors}")
+
+    outputs: dict[str, _BatchOutput] = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id is None:
+            continue
+        content = await request("GET", f"files/{file_id}/content")
+        for line in content.text.splitlines():
+            if line.strip():
+                output = _BatchOutput.model_validate_json(line)
+                outputs[output.custom_id] = output
+    return [
+        _batch_result(str(index), outputs.get(str(index)))
+        for index in range(len(bodies))
+    ]
+
+
+def _batch_result(
+    custom_id: str,
+    output: _BatchOutput | None,
+) -> dict[str, Any] | BatchError:
+    if output is None:
+        return BatchError(custom_id, "missing from the batch output")
+    if output.error or output.response is None:
+        return BatchError(custom_id, str(output.error))
+    if output.response.status_code >= httpx.codes.BAD_REQUEST:
+        return BatchError(
+            custom_id,
+            f"status {output.response.status_code}: {output.response.body}",
+        )
+    return output.response.body
@@ -0,0 +1,199 @@
+"""Completion caches keyed by a hash of the serialized request."""
+
+import asyncio
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+from ironhide.settings import settings
+from ironhide.sqlite import SqliteDatabase
+
+
+def cache_key(provider_url: str, body: bytes) -> str:
+    """Hash a request body into a cache key.
+
+    Args:
+        provider_url: The provider the request is sent to.
+        body: The serialized request body.
+
+    Returns:
+        A SHA-256 hex digest identifying the request.
+
+    """
+    return hashlib.sha256(provider_url.encode() + b"\n" + body).hexdigest()
+
+
+class CompletionCache(ABC):
+    """Base class of completion caches, counting hits and misses.
+
+    Subclasses store raw response bodies and implement ``_get`` and ``set``.
+    """
+
+    def __init__(self, ttl: float | None = None) -> None:
+        """Initialize the counters.
+
+        Args:
+            ttl: Seconds an entry stays valid, or None to never expire.
+                Defaults to ``ironhide_cache_ttl``.
+
+        """
+        self.ttl = ttl if ttl is not None else settings.ironhide_cache_ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> bytes | None:
+        """Look up a response body and update the hit/miss counters.
+
+        Args:
+            key: The request key from ``cache_key``.
+
+        Returns:
+            The cached response body, or None.
+
+        """
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    @abstractmethod
+    async def _get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a response body.
+
+        Args:
+            key: The request key from ``cache_key``.
+            value: The raw response body.
+
+        """
+
+
+class MemoryCache(CompletionCache):
+    """In-process LRU cache with an optional time to live."""
+
+    def __init__(self, maxsize: int | None = None, ttl: float | None = None) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries. Defaults to ``ironhide_cache_size``.
+            ttl: Seconds an entry stays valid. Defaults to ``ironhide_cache_ttl``.
+
+        """
+        super().__init__(ttl)
+        self.maxsize = maxsize or settings.ironhide_cache_size
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def _get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, value = entry
+        if self._is_expired(created_at):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a response body, evicting the least recently used entry if full.
+
+        Args:
+            key: The request key from ``cache_key``.
+            value: The raw response body.
+
+        """
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class SqliteCache(CompletionCache):
+    """On-disk cache shared between processes through a sqlite database.
+
+    Expired entries are deleted when read or when a new entry is stored,
+    and the oldest entries are evicted beyond ``maxsize``.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl: float | None = None,
+        maxsize: int | None = None,
+    ) -> None:
+        """Open or create the cache at ``path``.
+
+        Args:
+            path: Location of the sqlite file.
+            ttl: Seconds an entry stays valid. Defaults to ``ironhide_cache_ttl``.
+            maxsize: Maximum number of entries. Defaults to
+                ``ironhide_sqlite_cache_size``.
+
+        """
+        super().__init__(ttl)
+        self.maxsize = maxsize or settings.ironhide_sqlite_cache_size
+        self._database = SqliteDatabase(
+            path,
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS completions_created_at "
+            "ON completions (created_at)",
+        )
+
+    def _select(self, key: str) -> bytes | None:
+        with self._database.transaction() as connection:
+            row = connection.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and self._is_expired(row[1]):
+                connection.execute(
+                    "DELETE FROM completions WHERE key = ?",
+                    (key,),
+                )
+                return None
+        return None if row is None else bytes(row[0])
+
+    def _insert(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._database.transaction() as connection:
+            if self.ttl is not None:
+                connection.execute(
+                    "DELETE FROM completions WHERE created_at < ?",
+                    (now - self.ttl,),
+                )
+            connection.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            connection.execute(
+                "DELETE FROM completions WHERE key IN (SELECT key FROM completions "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    async def _get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._select, key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a response body.
+
+        Args:
+            key: The request key from ``cache_key``.
+            value: The raw response body.
+
+        """
+        await asyncio.to_thread(self._insert, key, value)
+
+    def close(self) -> None:
+        """Close the cache database."""
+        self._database.close()
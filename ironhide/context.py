@@ -0,0 +1,257 @@
+"""Policies keeping the conversation sent to the provider within a token budget."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Sequence
+
+from ironhide.history import MessageHistory
+from ironhide.models import _ImageUrlContent, _Message, _Role
+from ironhide.settings import settings
+
+type Summarizer = Callable[[list[_Message]], Awaitable[str]]
+
+_BYTES_PER_TOKEN = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+_IMAGE_TOKENS = 765
+
+
+def _message_tokens(message: _Message) -> int:
+    size = len(message.to_json())
+    if isinstance(message.content, list):
+        for part in message.content:
+            if isinstance(part, _ImageUrlContent):
+                size -= len(part.image_url.get("url", ""))
+                size += _IMAGE_TOKENS * _BYTES_PER_TOKEN
+    return size // _BYTES_PER_TOKEN
+
+
+def _token_counts(messages: Sequence[_Message]) -> list[int]:
+    """Estimate the tokens of each message.
+
+    Messages of a ``MessageHistory`` are measured on their stored JSON and
+    only rebuilt when they contain images.
+    """
+    if not isinstance(messages, MessageHistory):
+        return [_message_tokens(message) for message in messages]
+    return [
+        _message_tokens(record.decode())
+        if b'"image_url"' in record.json
+        else len(record.json) // _BYTES_PER_TOKEN
+        for record in messages.records
+    ]
+
+
+def estimate_tokens(messages: Sequence[_Message]) -> int:
+    """Estimate the prompt tokens of messages from their serialized size.
+
+    Inline images are counted at a flat rate instead of by the length of
+    their base64 data.
+
+    Args:
+        messages: The messages to estimate.
+
+    Returns:
+        The approximate number of tokens.
+
+    """
+    return sum(_token_counts(messages))
+
+
+def _is_summary(message: _Message) -> bool:
+    """Tell whether a message is a summary written by ``Summarize``."""
+    return (
+        message.role == _Role.user
+        and isinstance(message.content, str)
+        and message.content.startswith(SUMMARY_PREFIX)
+    )
+
+
+def _turn_starts(messages: Sequence[_Message]) -> list[int]:
+    """Indexes of the user inputs, the only safe places to cut a history.
+
+    Prompts the agent sends as the user, such as thought steps, repair
+    feedback and summaries, do not start a turn.
+    """
+    if isinstance(messages, MessageHistory):
+        return messages.turn_starts()
+    return [index for index, message in enumerate(messages) if message.starts_turn()]
+
+
+class ContextPolicy(ABC):
+    """Strategy compacting the message history before it is sent.
+
+    Policies run once per turn, before the new user input is added. They
+    only cut the history where a turn starts, so an assistant message is
+    never split from the tool results answering its ``tool_calls``, and they
+    always keep the latest turn.
+    """
+
+    @abstractmethod
+    async def apply(
+        self,
+        messages: Sequence[_Message],
+        budget: int | None,
+        summarize: Summarizer,
+    ) -> Sequence[_Message]:
+        """Compact the history.
+
+        Args:
+            messages: The current history, without the system instructions.
+            budget: Tokens available for the history, or None for no budget.
+            summarize: Coroutine function summarizing a list of messages.
+
+        Returns:
+            The messages to keep.
+
+        """
+
+
+class SlidingWindow(ContextPolicy):
+    """Drop the oldest turns until the history fits the budget."""
+
+    async def apply(
+        self,
+        messages: Sequence[_Message],
+        budget: int | None,
+        summarize: Summarizer,  # noqa: ARG002
+    ) -> Sequence[_Message]:
+        """Drop whole turns from the start of the history.
+
+        Args:
+            messages: The current history, without the system instructions.
+            budget: Tokens available for the history, or None for no budget.
+            summarize: Unused.
+
+        Returns:
+            The most recent turns fitting the budget.
+
+        """
+        counts = _token_counts(messages)
+        if budget is None or sum(counts) <= budget:
+            return messages
+        starts = _turn_starts(messages)
+        for start in starts:
+            if sum(counts[start:]) <= budget:
+                return messages[start:]
+        return messages[starts[-1] :] if starts else messages
+
+
+class KeepSystemAndLastN(ContextPolicy):
+    """Keep system messages and the last ``n`` messages, regardless of budget."""
+
+    def __init__(self, n: int) -> None:
+        """Initialize the policy.
+
+        Args:
+            n: Minimum number of recent messages to keep, besides the new
+                input. More may be kept so the history starts on a user input.
+
+        """
+        self.n = n
+
+    async def apply(
+        self,
+        messages: Sequence[_Message],
+        budget: int | None,  # noqa: ARG002
+        summarize: Summarizer,  # noqa: ARG002
+    ) -> Sequence[_Message]:
+        """Drop older messages other than system messages.
+
+        Args:
+            messages: The current history, without the system instructions.
+            budget: Unused.
+            summarize: Unused.
+
+        Returns:
+            The system messages followed by the most recent messages.
+
+        """
+        cut = len(messages) - self.n
+        starts = [start for start in _turn_starts(messages) if start <= cut]
+        if cut <= 0 or not starts:
+            return messages
+        cut = starts[-1]
+        system = [message for message in messages[:cut] if message.role == _Role.system]
+        return [*system, *messages[cut:]]
+
+
+class DropToolCalls(ContextPolicy):
+    """Remove tool calls and their results from turns that are already answered."""
+
+    async def apply(
+        self,
+        messages: Sequence[_Message],
+        budget: int | None,
+        summarize: Summarizer,  # noqa: ARG002
+    ) -> Sequence[_Message]:
+        """Drop tool traffic before the latest turn when over budget.
+
+        Args:
+            messages: The current history, without the system instructions.
+            budget: Tokens available for the history, or None to always drop.
+            summarize: Unused.
+
+        Returns:
+            The history without completed tool calls.
+
+        """
+        if budget is not None and estimate_tokens(messages) <= budget:
+            return messages
+        starts = _turn_starts(messages)
+        if not starts:
+            return messages
+        last = starts[-1]
+        kept = [
+            message
+            for message in messages[:last]
+            if message.role != _Role.tool and not message.tool_calls
+        ]
+        return [*kept, *messages[last:]]
+
+
+class Summarize(ContextPolicy):
+    """Replace older turns with a summary written by the model."""
+
+    def __init__(self, keep_last: int = 1, prompt: str | None = None) -> None:
+        """Initialize the policy.
+
+        Args:
+            keep_last: Number of most recent turns kept verbatim, besides the
+                one the new input starts.
+            prompt: Instructions for the summary. Defaults to
+                ``ironhide_summary_prompt``.
+
+        """
+        self.keep_last = keep_last
+        self.prompt = prompt or settings.ironhide_summary_prompt
+
+    async def apply(
+        self,
+        messages: Sequence[_Message],
+        budget: int | None,
+        summarize: Summarizer,
+    ) -> Sequence[_Message]:
+        """Summarize the turns before the last ``keep_last`` when over budget.
+
+        Args:
+            messages: The current history, without the system instructions.
+            budget: Tokens available for the history, or None to always summarize.
+            summarize: Coroutine function summarizing a list of messages.
+
+        Returns:
+            A summary message followed by the recent turns. The history is
+            returned unchanged when nothing but a previous summary precedes
+            the kept turns.
+
+        """
+        if budget is not None and estimate_tokens(messages) <= budget:
+            return messages
+        starts = _turn_starts(messages)
+        if len(starts) <= self.keep_last:
+            return messages
+        cut = starts[-self.keep_last] if self.keep_last else len(messages)
+        if cut == 1 and _is_summary(messages[0]):
+            return messages
+        summary = await summarize(
+            [*messages[:cut], _Message.prompt(self.prompt)],
+        )
+        return [_Message.prompt(SUMMARY_PREFIX + summary), *messages[cut:]]
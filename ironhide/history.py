@@ -0,0 +1,256 @@
+"""Compact storage of the conversation history."""
+
+import sys
+from collections.abc import Iterable, MutableSequence
+from typing import overload
+
+from ironhide.models import _Message, _Record, _Role
+from ironhide.store import StoredMessage
+
+_INLINE_IMAGE = b'"url":"data:'
+
+
+def _stored(record: _Record) -> StoredMessage:
+    return (record.role, record.json, record.starts_turn())
+
+
+class MessageHistory(MutableSequence[_Message]):
+    """List of messages stored as their serialized JSON.
+
+    Each message is kept as a slotted record holding its interned role and
+    the bytes sent to the provider, instead of a tree of pydantic models.
+    Requests splice the stored bytes directly, and a ``_Message`` is only
+    rebuilt when the history is read by index or iterated. Changes to a
+    message read from the history must be written back by assignment.
+
+    Once ``track_appends`` is called, the messages added after the last
+    ``take_appended`` are kept track of, so they can be saved to a
+    conversation store. They always form the end of the history: removing
+    or replacing one of them before it is taken means it is never saved.
+    """
+
+    __slots__ = ("_records", "_saved")
+
+    def __init__(self, messages: Iterable[_Message] = ()) -> None:
+        """Store the initial messages.
+
+        Args:
+            messages: The messages to store, oldest first.
+
+        """
+        # Number of leading records already saved, or None when not tracking.
+        self._saved: int | None = None
+        if isinstance(messages, MessageHistory):
+            self._records = list(messages.records)
+        else:
+            self._records = [_Record(message) for message in messages]
+
+    @classmethod
+    def from_stored(cls, messages: Iterable[StoredMessage]) -> "MessageHistory":
+        """Build a history from messages that are already serialized.
+
+        Args:
+            messages: The role, JSON and turn flag of each message, oldest
+                first.
+
+        Returns:
+            The history, without decoding the messages.
+
+        """
+        history = cls()
+        history._records = [
+            _Record.from_json(role, json, prompt=role == _Role.user and not turn)
+            for role, json, turn in messages
+        ]
+        return history
+
+    @property
+    def records(self) -> list[_Record]:
+        """The stored records, oldest first. Do not mutate."""
+        return self._records
+
+    def track_appends(self) -> None:
+        """Start tracking the messages added from now on."""
+        if self._saved is None:
+            self._saved = len(self._records)
+
+    def take_appended(self) -> list[StoredMessage]:
+        """Return the messages added since the last call, as they are stored.
+
+        Returns:
+            The new messages still in the history, oldest first. Empty
+            unless ``track_appends`` was called.
+
+        """
+        if self._saved is None:
+            return []
+        appended = self._records[self._saved :]
+        self._saved = len(self._records)
+        return [_stored(record) for record in appended]
+
+    def compact(self, messages: Iterable[_Message]) -> list[StoredMessage]:
+        """Replace the whole history with a compacted version of it.
+
+        Unsaved messages found again at the end of ``messages`` stay
+        unsaved. The older ones, which the compaction dropped, are returned
+        so they can still be saved.
+
+        Args:
+            messages: The compacted history, oldest first.
+
+        Returns:
+            The unsaved messages that were dropped, as they are stored.
+
+        """
+        records = [_Record(message) for message in messages]
+        if self._saved is None:
+            self._records = records
+            return []
+        unsaved = self._records[self._saved :]
+        kept = 0
+        while (
+            kept < min(len(unsaved), len(records))
+            and unsaved[-1 - kept].json == records[-1 - kept].json
+        ):
+            kept += 1
+        self._records = records
+        self._saved = len(records) - kept
+        return [_stored(record) for record in unsaved[: len(unsaved) - kept]]
+
+    def append(self, value: _Message) -> None:
+        """Add a message at the end of the history.
+
+        Args:
+            value: The message to add.
+
+        """
+        self._records.append(_Record(value))
+
+    def _saved_at(self, index: int | slice) -> int:
+        """Count the saved records at ``index``."""
+        saved = self._saved or 0
+        if isinstance(index, int):
+            return int(range(len(self._records))[index] < saved)
+        return sum(position < saved for position in range(len(self._records))[index])
+
+    def roles(self) -> list[str]:
+        """List the role of every message without decoding them.
+
+        Returns:
+            The roles, oldest first.
+
+        """
+        return [record.role for record in self._records]
+
+    def turn_starts(self) -> list[int]:
+        """List the position of every user input that starts a turn.
+
+        Returns:
+            The positions, oldest first.
+
+        """
+        return [
+            index for index, record in enumerate(self._records) if record.starts_turn()
+        ]
+
+    def has_inline_image(self, index: int) -> bool:
+        """Tell whether a message embeds an image as a ``data:`` URL.
+
+        Args:
+            index: Position of the message.
+
+        Returns:
+            True if the message holds at least one inline image.
+
+        """
+        return _INLINE_IMAGE in self._records[index].json
+
+    def nbytes(self) -> int:
+        """Estimate the memory held by the history.
+
+        Returns:
+            The size in bytes of the records, their JSON and the list itself.
+            Interned roles are shared and not counted.
+
+        """
+        return sys.getsizeof(self._records) + sum(
+            sys.getsizeof(record)
+            + sys.getsizeof(record.json)
+            + (sys.getsizeof(record.names) if record.names else 0)
+            for record in self._records
+        )
+
+    def __len__(self) -> int:
+        """Return the number of messages."""
+        return len(self._records)
+
+    @overload
+    def __getitem__(self, index: int) -> _Message: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[_Message]: ...
+
+    def __getitem__(self, index: int | slice) -> _Message | list[_Message]:
+        """Rebuild the message, or list of messages, at ``index``."""
+        if isinstance(index, slice):
+            return [record.decode() for record in self._records[index]]
+        return self._records[index].decode()
+
+    @overload
+    def __setitem__(self, index: int, value: _Message) -> None: ...
+
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[_Message]) -> None: ...
+
+    def __setitem__(
+        self,
+        index: int | slice,
+        value: _Message | Iterable[_Message],
+    ) -> None:
+        """Replace the message, or messages, at ``index``."""
+        if isinstance(index, slice):
+            if isinstance(value, _Message):
+                message = "can only assign an iterable of messages to a slice"
+                raise TypeError(message)
+            records = [_Record(message) for message in value]
+            if self._saved is not None and index.step in {None, 1}:
+                start = range(len(self._records))[index].start
+                self._saved -= self._saved_at(index)
+                if start < self._saved:
+                    self._saved += len(records)
+            self._records[index] = records
+        elif isinstance(value, _Message):
+            self._records[index] = _Record(value)
+        else:
+            message = "can only assign a message to an index"
+            raise TypeError(message)
+
+    def __delitem__(self, index: int | slice) -> None:
+        """Remove the message, or messages, at ``index``."""
+        if self._saved is not None:
+            self._saved -= self._saved_at(index)
+        del self._records[index]
+
+    def insert(self, index: int, value: _Message) -> None:
+        """Insert a message before ``index``.
+
+        Args:
+            index: Position of the new message.
+            value: The message to insert.
+
+        """
+        if self._saved is not None and index < 0:
+            index = max(len(self._records) + index, 0)
+        if self._saved is not None and index < self._saved:
+            self._saved += 1
+        self._records.insert(index, _Record(value))
+
+    def clear(self) -> None:
+        """Remove every message."""
+        self._records.clear()
+        if self._saved is not None:
+            self._saved = 0
+
+    def __repr__(self) -> str:
+        """Show the number of messages stored."""
+        return f"MessageHistory({len(self._records)} messages)"
@@ -0,0 +1,111 @@
+"""Encoding of image attachments into ``data:`` URLs.
+
+Downscaling requires Pillow, installed with the ``images`` extra.
+"""
+
+import base64
+import io
+import mimetypes
+import mmap
+from collections.abc import Buffer, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import IO, Any
+
+from httpx._types import RequestFiles
+
+from ironhide.settings import settings
+
+type ImageFiles = RequestFiles | Sequence[Path]
+
+_ALPHA_MODES = {"RGBA", "LA", "P"}
+
+
+def iter_images(files: ImageFiles) -> Iterator[tuple[str, Any, str | None]]:
+    """List the attachments of a request.
+
+    Args:
+        files: A ``RequestFiles`` mapping or sequence, or a sequence of paths.
+
+    Yields:
+        The file name, content and MIME type (None if unknown) of each file.
+
+    """
+    entries = files.items() if isinstance(files, Mapping) else files
+    for entry in entries:
+        if isinstance(entry, Path):
+            yield entry.name, entry, None
+            continue
+        field, value = entry
+        if isinstance(value, tuple):
+            yield str(value[0] or field), value[1], value[2] if len(value) > 2 else None  # noqa: PLR2004
+        else:
+            yield str(getattr(value, "name", field)), value, None
+
+
+def _downscale(
+    content: Path | IO[bytes] | Buffer,
+    max_size: int,
+) -> tuple[bytes, str] | None:
+    try:
+        from PIL import Image  # noqa: PLC0415
+    except ImportError as exc:
+        message = "Resizing images requires Pillow: pip install 'ironhide[images]'"
+        raise ImportError(message) from exc
+
+    source = io.BytesIO(content) if isinstance(content, Buffer) else content
+    with Image.open(source) as image:
+        if max(image.size) <= max_size:
+            return None
+        image.thumbnail((max_size, max_size))
+        buffer = io.BytesIO()
+        if image.mode in _ALPHA_MODES:
+            image.save(buffer, "PNG", optimize=True)
+            return buffer.getvalue(), "image/png"
+        image.convert("RGB").save(
+            buffer,
+            "JPEG",
+            quality=settings.ironhide_image_quality,
+        )
+        return buffer.getvalue(), "image/jpeg"
+
+
+def encode_image(
+    name: str,
+    content: Path | IO[bytes] | Buffer,
+    mime: str | None = None,
+    max_size: int | None = None,
+) -> str:
+    """Encode an image as a base64 ``data:`` URL.
+
+    Paths are memory-mapped and buffers are encoded without being copied.
+    Images larger than ``max_size`` are downscaled and re-encoded first.
+
+    Args:
+        name: File name, used to guess the MIME type.
+        content: A path, a binary file object or the image bytes.
+        mime: MIME type of the image. Guessed from ``name`` when omitted.
+        max_size: Maximum width and height in pixels, or None to keep the
+            original image.
+
+    Returns:
+        The ``data:`` URL.
+
+    """
+    mime = mime or mimetypes.guess_type(name)[0] or "image/png"
+    if max_size:
+        downscaled = _downscale(content, max_size)
+        if downscaled is not None:
+            content, mime = downscaled
+        elif not isinstance(content, Path | Buffer):
+            content.seek(0)
+    if isinstance(content, Path):
+        with (
+            content.open("rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            encoded = base64.b64encode(mapped)
+    elif isinstance(content, Buffer):
+        encoded = base64.b64encode(content)
+    else:
+        encoded = base64.b64encode(content.read())
+    return f"data:{mime};base64,{encoded.decode('ascii')}"
@@ -0,0 +1,307 @@
+"""Token and cost accounting shared by many agents, flushed to a store in batches."""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ironhide.models import _Usage
+from ironhide.settings import settings
+from ironhide.sqlite import SqliteDatabase
+
+logger = logging.getLogger(__name__)
+
+_PER_TOKEN = 1e-6
+
+
+class Price(BaseModel):
+    """Price of a model, in currency units per million tokens.
+
+    Cached prompt tokens default to the prompt price and reasoning tokens to
+    the completion price.
+    """
+
+    prompt: float
+    completion: float
+    cached_prompt: float | None = None
+    reasoning: float | None = None
+
+
+class LedgerEntry(BaseModel):
+    """Tokens and cost of one completion."""
+
+    timestamp: float
+    agent: str
+    model: str
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    reasoning_tokens: int = 0
+    cost: float = 0.0
+
+
+class LedgerTotal(BaseModel):
+    """Running totals of a model."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    reasoning_tokens: int = 0
+    cost: float = 0.0
+
+    def add(self, entry: LedgerEntry) -> None:
+        """Add an entry to the totals.
+
+        Args:
+            entry: The entry to add.
+
+        """
+        self.requests += 1
+        self.prompt_tokens += entry.prompt_tokens
+        self.cached_tokens += entry.cached_tokens
+        self.completion_tokens += entry.completion_tokens
+        self.reasoning_tokens += entry.reasoning_tokens
+        self.cost += entry.cost
+
+
+class LedgerStore(ABC):
+    """Persistent destination of ledger entries."""
+
+    @abstractmethod
+    def append(self, entries: Sequence[LedgerEntry]) -> None:
+        """Store entries. Called from a worker thread.
+
+        Args:
+            entries: The entries to store, oldest first.
+
+        """
+
+    def close(self) -> None:  # noqa: B027
+        """Release the store's resources."""
+
+
+class SqliteLedgerStore(LedgerStore):
+    """Ledger entries kept in a sqlite database, one row per completion."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the ledger at ``path``.
+
+        Args:
+            path: Location of the sqlite file.
+
+        """
+        self._database = SqliteDatabase(
+            path,
+            "CREATE TABLE IF NOT EXISTS ledger (timestamp REAL NOT NULL, "
+            "agent TEXT NOT NULL, model TEXT NOT NULL, "
+            "prompt_tokens INTEGER NOT NULL, cached_tokens INTEGER NOT NULL, "
+            "completion_tokens INTEGER NOT NULL, reasoning_tokens INTEGER NOT NULL, "
+            "cost REAL NOT NULL)",
+        )
+
+    def append(self, entries: Sequence[LedgerEntry]) -> None:
+        """Insert entries in a single transaction.
+
+        Args:
+            entries: The entries to store, oldest first.
+
+        """
+        with self._database.transaction() as connection:
+            connection.executemany(
+                "INSERT INTO ledger VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        entry.timestamp,
+                        entry.agent,
+                        entry.model,
+                        entry.prompt_tokens,
+                        entry.cached_tokens,
+                        entry.completion_tokens,
+                        entry.reasoning_tokens,
+                        entry.cost,
+                    )
+                    for entry in entries
+                ],
+            )
+
+    def totals(self) -> dict[str, LedgerTotal]:
+        """Aggregate the stored entries per model.
+
+        Returns:
+            The totals of every model found in the database.
+
+        """
+        with self._database.read() as connection:
+            rows = connection.execute(
+                "SELECT model, COUNT(*), SUM(prompt_tokens), SUM(cached_tokens), "
+                "SUM(completion_tokens), SUM(reasoning_tokens), SUM(cost) "
+                "FROM ledger GROUP BY model",
+            ).fetchall()
+        fields = tuple(LedgerTotal.model_fields)
+        return {
+            row[0]: LedgerTotal(**dict(zip(fields, row[1:], strict=True)))
+            for row in rows
+        }
+
+    def close(self) -> None:
+        """Close the ledger database."""
+        self._database.close()
+
+
+class CostLedger:
+    """Price completions and keep running totals per model.
+
+    A ledger can be shared by any number of agents through their ``ledger``
+    attribute. Entries are buffered and written to the ``store`` in batches;
+    call ``flush`` at shutdown to write the remainder.
+    """
+
+    def __init__(
+        self,
+        prices: Mapping[str, Price],
+        store: LedgerStore | None = None,
+        batch_size: int | None = None,
+    ) -> None:
+        """Initialize an empty ledger.
+
+        Args:
+            prices: Price of each model. A model returned by the provider
+                with a version suffix, e.g. ``gpt-4o-mini-2024-07-18``, uses
+                the price of the longest matching prefix.
+            store: Where to persist entries, or None to only keep totals.
+            batch_size: Entries buffered before ``should_flush`` becomes
+                true. Defaults to ``ironhide_ledger_batch_size``.
+
+        """
+        self.prices = dict(prices)
+        self.store = store
+        self.batch_size = batch_size or settings.ironhide_ledger_batch_size
+        self.totals: dict[str, LedgerTotal] = {}
+        self.pending: list[LedgerEntry] = []
+        self._resolved: dict[str, Price | None] = {}
+        self._flush_lock = asyncio.Lock()
+
+    def price(self, model: str) -> Price | None:
+        """Find the price of a model.
+
+        Args:
+            model: The model identifier.
+
+        Returns:
+            The price, or None if the model has none.
+
+        """
+        if model not in self._resolved:
+            matches = [name for name in self.prices if model.startswith(name)]
+            price = self.prices[max(matches, key=len)] if matches else None
+            if price is None:
+                logger.warning("No price for model %s, its cost is counted as 0", model)
+            self._resolved[model] = price
+        return self._resolved[model]
+
+    def cost(self, model: str, usage: _Usage) -> float:
+        """Compute the cost of a usage report.
+
+        Args:
+            model: The model that produced the usage.
+            usage: The usage report.
+
+        Returns:
+            The cost in the currency of the prices.
+
+        """
+        price = self.price(model)
+        if price is None:
+            return 0.0
+        cached = (
+            usage.prompt_tokens_details.cached_tokens
+            if usage.prompt_tokens_details
+            else 0
+        )
+        reasoning = (
+            usage.completion_tokens_details.reasoning_tokens
+            if usage.completion_tokens_details
+            else 0
+        )
+        cached_price = (
+            price.prompt if price.cached_prompt is None else price.cached_prompt
+        )
+        reasoning_price = (
+            price.completion if price.reasoning is None else price.reasoning
+        )
+        return _PER_TOKEN * (
+            (usage.prompt_tokens - cached) * price.prompt
+            + cached * cached_price
+            + (usage.completion_tokens - reasoning) * price.completion
+            + reasoning * reasoning_price
+        )
+
+    def record(self, agent: str, model: str, usage: _Usage) -> LedgerEntry:
+        """Price a completion and add it to the totals and the pending batch.
+
+        Args:
+            agent: Name of the agent that made the request.
+            model: The model that produced the completion.
+            usage: The usage report of the completion.
+
+        Returns:
+            The new entry.
+
+        """
+        entry = LedgerEntry(
+            timestamp=time.time(),
+            agent=agent,
+            model=model,
+            prompt_tokens=usage.prompt_tokens,
+            cached_tokens=(
+                usage.prompt_tokens_details.cached_tokens
+                if usage.prompt_tokens_details
+                else 0
+            ),
+            completion_tokens=usage.completion_tokens,
+            reasoning_tokens=(
+                usage.completion_tokens_details.reasoning_tokens
+                if usage.completion_tokens_details
+                else 0
+            ),
+            cost=self.cost(model, usage),
+        )
+        if model not in self.totals:
+            self.totals[model] = LedgerTotal()
+        self.totals[model].add(entry)
+        if self.store is not None:
+            self.pending.append(entry)
+        return entry
+
+    @property
+    def total_cost(self) -> float:
+        """Cost of every completion recorded so far."""
+        return sum(total.cost for total in self.totals.values())
+
+    @property
+    def should_flush(self) -> bool:
+        """Whether a full batch is waiting to be written."""
+        return len(self.pending) >= self.batch_size
+
+    async def flush(self) -> None:
+        """Write the pending entries to the store, off the event loop."""
+        async with self._flush_lock:
+            if self.store is None or not self.pending:
+                return
+            entries, self.pending = self.pending, []
+            try:
+                await asyncio.to_thread(self.store.append, entries)
+            except BaseException:
+                self.pending[:0] = entries
+                raise
+
+    async def aclose(self) -> None:
+        """Flush the pending entries and close the store."""
+        await self.flush()
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,313 @@
+"""Wire models exchanged with OpenAI-compatible chat completion APIs."""
+
+import sys
+from enum import Enum
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, PrivateAttr, SkipValidation, field_serializer
+
+
+class _PropertyDefinition(BaseModel):
+    type: str
+    description: str
+
+
+class _ParametersDefinition(BaseModel):
+    type: str = "object"
+    properties: dict[str, _PropertyDefinition]
+    required: list[str]
+    additional_properties: bool = Field(alias="additionalProperties", default=False)
+
+
+class _FunctionDefinition(BaseModel):
+    name: str
+    description: str
+    parameters: _ParametersDefinition
+    strict: bool = True
+
+
+class _ToolDefinition(BaseModel):
+    type: str = "function"
+    function: _FunctionDefinition
+
+
+class _Headers(BaseModel):
+    content_type: str = Field(
+        alias="Content-Type",
+        default="application/json",
+    )
+    authorization: str = Field(alias="Authorization")
+
+
+class _Role(str, Enum):
+    system = "system"
+    assistant = "assistant"
+    user = "user"
+    tool = "tool"
+
+
+class _PromptTokensDetails(BaseModel):
+    cached_tokens: int = 0
+    audio_tokens: int = 0
+
+
+class _CompletionTokensDetails(BaseModel):
+    reasoning_tokens: int = 0
+    audio_tokens: int = 0
+    accepted_prediction_tokens: int = 0
+    rejected_prediction_tokens: int = 0
+
+
+class _Usage(BaseModel):
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    prompt_tokens_details: _PromptTokensDetails | None = None
+    completion_tokens_details: _CompletionTokensDetails | None = None
+
+
+class _ToolFunction(BaseModel):
+    name: str
+    arguments: str
+
+
+class _ThoughtSignature(BaseModel):
+    thought_signature: str
+
+
+class _ExtraContent(BaseModel):
+    google: _ThoughtSignature
+
+
+class _ToolCall(BaseModel):
+    id: str
+    type: Literal["function"]
+    function: _ToolFunction
+    extra_content: _ExtraContent | None = None
+
+
+class _TextContent(BaseModel):
+    type: str = "text"
+    text: str
+    cache_control: dict[str, str] | None = None
+
+
+class _ImageUrlContent(BaseModel):
+    type: str = "image_url"
+    image_url: dict[str, str]
+    cache_control: dict[str, str] | None = None
+    _name: str = PrivateAttr(default="")
+
+
+class _Message(BaseModel):
+    role: _Role
+    content: str | list[_TextContent | _ImageUrlContent] | None = None
+    tool_calls: list[_ToolCall] | None = None
+    tool_call_id: str | None = None
+    refusal: str | None = None
+    model_config = {"use_enum_values": True}
+    _json: bytes | None = PrivateAttr(default=None)
+    _prompt: bool = PrivateAttr(default=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
+        """Set an attribute, invalidating the cached serialization."""
+        super().__setattr__(name, value)
+        if name not in {"_json", "_prompt"}:
+            self._json = None
+
+    @classmethod
+    def prompt(cls, content: str) -> "_Message":
+        """Build a user-role message written by the agent rather than the user.
+
+        Such messages (thought prompts, repair feedback, summaries) are sent
+        as the user but do not start a turn.
+        """
+        message = cls(role=_Role.user, content=content)
+        message._prompt = True
+        return message
+
+    def starts_turn(self) -> bool:
+        """Return whether the message is a user input that starts a turn."""
+        return self.role == _Role.user and not self._prompt
+
+    def to_json(self) -> bytes:
+        """Serialize the message for the API, reusing the previous result.
+
+        The cache is invalidated when a field of the message is reassigned;
+        in-place changes to nested objects are not tracked.
+        """
+        if self._json is None:
+            self._json = self.model_dump_json(by_alias=True, exclude_none=True).encode()
+        return self._json
+
+
+class _Record:
+    """Compact form of a ``_Message``: its interned role and wire JSON.
+
+    Image file names and the prompt flag, which are not part of the JSON, are
+    kept aside so ``decode`` restores an equivalent message.
+    """
+
+    __slots__ = ("json", "names", "prompt", "role")
+
+    def __init__(self, message: _Message) -> None:
+        self.role = sys.intern(str(message.role))
+        self.json = message.to_json()
+        self.prompt = message._prompt  # noqa: SLF001
+        self.names: tuple[str, ...] | None = None
+        if isinstance(message.content, list):
+            names = tuple(
+                part._name  # noqa: SLF001
+                for part in message.content
+                if isinstance(part, _ImageUrlContent)
+            )
+            self.names = names if any(names) else None
+
+    @classmethod
+    def from_json(cls, role: str, json: bytes, *, prompt: bool = False) -> "_Record":
+        """Wrap a message that is already serialized, e.g. read from a store."""
+        record = cls.__new__(cls)
+        record.role = sys.intern(role)
+        record.json = json
+        record.names = None
+        record.prompt = prompt
+        return record
+
+    def starts_turn(self) -> bool:
+        """Return whether the message is a user input that starts a turn."""
+        return self.role == _Role.user and not self.prompt
+
+    def to_json(self) -> bytes:
+        """Return the serialized message."""
+        return self.json
+
+    def decode(self) -> _Message:
+        """Rebuild the message, reusing the stored JSON as its cache."""
+        message = _Message.model_validate_json(self.json)
+        message._json = self.json  # noqa: SLF001
+        message._prompt = self.prompt  # noqa: SLF001
+        if self.names and isinstance(message.content, list):
+            images = (
+                part for part in message.content if isinstance(part, _ImageUrlContent)
+            )
+            for image, name in zip(images, self.names, strict=True):
+                image._name = name  # noqa: SLF001
+        return message
+
+
+class _Choice(BaseModel):
+    index: int
+    message: _Message
+    logprobs: dict[str, Any] | None = None
+    finish_reason: str
+
+
+class _ChatCompletion(BaseModel):
+    id: str
+    object: Literal["chat.completion"]
+    created: int
+    model: str
+    choices: list[_Choice]
+    usage: _Usage
+    service_tier: str | None = None
+    system_fingerprint: str | None = None
+
+
+class _ToolFunctionDelta(BaseModel):
+    name: str | None = None
+    arguments: str | None = None
+
+
+class _ToolCallDelta(BaseModel):
+    index: int
+    id: str | None = None
+    type: Literal["function"] | None = None
+    function: _ToolFunctionDelta | None = None
+    extra_content: _ExtraContent | None = None
+
+
+class _Delta(BaseModel):
+    role: _Role | None = None
+    content: str | None = None
+    tool_calls: list[_ToolCallDelta] | None = None
+    refusal: str | None = None
+
+
+class _ChunkChoice(BaseModel):
+    index: int
+    delta: _Delta
+    finish_reason: str | None = None
+
+
+class _ChatCompletionChunk(BaseModel):
+    id: str
+    object: Literal["chat.completion.chunk"]
+    created: int
+    model: str
+    choices: list[_ChunkChoice]
+    usage: _Usage | None = None
+    service_tier: str | None = None
+    system_fingerprint: str | None = None
+
+
+class _StreamOptions(BaseModel):
+    include_usage: bool = True
+
+
+class _JsonSchema(BaseModel):
+    name: str
+    schema_: dict[str, Any] = Field(alias="schema")
+    strict: bool = True
+
+
+class _ResponseFormat(BaseModel):
+    type: str = "json_schema"
+    json_schema: _JsonSchema
+
+
+class _Data(BaseModel):
+    model: str
+    reasoning_effort: Literal["low", "medium", "high"] | None = None
+    messages: SkipValidation[list[_Message | _Record]]
+    response_format: dict[str, Any] | None = None
+    tools: list[dict[str, Any]] | None = None
+    tool_choice: Literal["none", "auto", "required"] | None = None
+    stream: bool | None = None
+    stream_options: _StreamOptions | None = None
+    prompt_cache_key: str | None = None
+    model_config = {"arbitrary_types_allowed": True}
+
+    @field_serializer("messages")
+    def _serialize_messages(
+        self,
+        messages: list[_Message | _Record],
+    ) -> list[_Message]:
+        return [
+            message.decode() if isinstance(message, _Record) else message
+            for message in messages
+        ]
+
+    def to_json(self) -> bytes:
+        """Serialize the request body, splicing in each message's cached JSON.
+
+        Only messages added or modified since the previous request are
+        serialized again, so the cost per turn does not grow with the history.
+        """
+        envelope = self.model_dump_json(
+            by_alias=True,
+            exclude_none=True,
+            exclude={"messages"},
+        )
+        messages = b",".join(message.to_json() for message in self.messages)
+        return b'{"messages":[' + messages + b"]," + envelope[1:].encode()
+
+
+class _Error(BaseModel):
+    message: str
+    type: str
+    param: str | None = None
+    code: str | None
+
+
+class _ErrorResponse(BaseModel):
+    error: _Error
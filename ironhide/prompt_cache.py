@@ -0,0 +1,70 @@
+"""Helpers keeping requests friendly to provider-side prompt caching."""
+
+import hashlib
+from typing import Any
+
+from ironhide.models import _ImageUrlContent, _Message, _TextContent
+from ironhide.utils import Provider
+
+EPHEMERAL: dict[str, str] = {"type": "ephemeral"}
+
+# Providers caching only up to explicit ``cache_control`` breakpoints.
+CACHE_CONTROL_PROVIDERS = frozenset(
+    {Provider.anthropic, Provider.openrouter, Provider.qwen},
+)
+
+# Providers routing requests by the ``prompt_cache_key`` parameter.
+CACHE_KEY_PROVIDERS = frozenset({Provider.openai})
+
+
+def with_cache_control(message: _Message, cache_control: dict[str, str]) -> _Message:
+    """Return a copy of a message whose last content part is a cache breakpoint.
+
+    Args:
+        message: The message ending the prefix to cache.
+        cache_control: The provider annotation, e.g. ``{"type": "ephemeral"}``.
+
+    Returns:
+        The annotated copy, or the message itself if it has no content.
+
+    """
+    parts: list[_TextContent | _ImageUrlContent]
+    if isinstance(message.content, str) and message.content:
+        parts = [_TextContent(text=message.content, cache_control=cache_control)]
+    elif isinstance(message.content, list) and message.content:
+        parts = [
+            *message.content[:-1],
+            message.content[-1].model_copy(update={"cache_control": cache_control}),
+        ]
+    else:
+        return message
+    annotated = message.model_copy()
+    annotated.content = parts
+    return annotated
+
+
+def prompt_cache_key(
+    model: str,
+    instructions: str | None,
+    tools: list[dict[str, Any]] | None,
+    response_format: dict[str, Any] | None,
+) -> str:
+    """Derive a routing key from the static part of the prompt.
+
+    Requests sharing instructions, tools and schema get the same key, so the
+    provider sends them to the machines already holding that prefix.
+
+    Args:
+        model: The model identifier.
+        instructions: The system instructions.
+        tools: The tool definitions.
+        response_format: The ``response_format`` section.
+
+    Returns:
+        A short hexadecimal key.
+
+    """
+    digest = hashlib.sha256(
+        repr((model, instructions, tools, response_format)).encode(),
+    )
+    return digest.hexdigest()[:32]
@@ -0,0 +1,166 @@
+"""Client-side rate limiting shared by every agent using the same provider and model."""
+
+import threading
+import time
+from asyncio import sleep
+
+_SECONDS_PER_MINUTE = 60
+_CALIBRATION_WEIGHT = 0.2
+
+
+class RateLimiter:
+    """Token buckets for requests per minute and tokens per minute.
+
+    Capacity is reserved once per request, retries included, from an
+    estimate of the prompt size. It is corrected with the ``usage`` of the
+    completion, or released if the request fails. The estimate itself is
+    calibrated against the prompt tokens reported by the provider. The
+    buckets are updated under a thread lock and waiting callers go into
+    debt instead of holding it, so the limiter can be shared across event
+    loops and threads.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> None:
+        """Initialize the limiter with full buckets.
+
+        Args:
+            requests_per_minute: Request quota, or None for no request limit.
+            tokens_per_minute: Token quota, or None for no token limit.
+
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens_per_byte = 0.25
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._updated_at) / _SECONDS_PER_MINUTE
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed_minutes * self.requests_per_minute,
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed_minutes * self.tokens_per_minute,
+            )
+
+    def _wait_time(self) -> float:
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 0:
+            wait = -self._requests / self.requests_per_minute * _SECONDS_PER_MINUTE
+        if self.tokens_per_minute and self._tokens < 0:
+            wait = max(
+                wait,
+                -self._tokens / self.tokens_per_minute * _SECONDS_PER_MINUTE,
+            )
+        return wait
+
+    def estimate(self, body_size: int) -> int:
+        """Estimate the prompt tokens of a request body.
+
+        Args:
+            body_size: Size in bytes of the serialized request.
+
+        Returns:
+            The calibrated token estimate.
+
+        """
+        return int(body_size * self.tokens_per_byte)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Reserve one request and ``estimated_tokens``, waiting if over quota.
+
+        Args:
+            estimated_tokens: Tokens expected to be consumed by the request.
+
+        """
+        with self._lock:
+            self._refill()
+            self._requests -= 1
+            self._tokens -= estimated_tokens
+            wait = self._wait_time()
+        if wait > 0:
+            await sleep(wait)
+
+    def release(self, estimated_tokens: int) -> None:
+        """Give back a reservation whose request never completed.
+
+        Args:
+            estimated_tokens: Tokens reserved by ``acquire``.
+
+        """
+        with self._lock:
+            self._refill()
+            if self.requests_per_minute:
+                self._requests = min(self.requests_per_minute, self._requests + 1)
+            if self.tokens_per_minute:
+                self._tokens = min(
+                    self.tokens_per_minute,
+                    self._tokens + estimated_tokens,
+                )
+
+    def record(
+        self,
+        body_size: int,
+        estimated_tokens: int,
+        prompt_tokens: int,
+        total_tokens: int,
+    ) -> None:
+        """Correct the reservation with the usage reported by the provider.
+
+        Args:
+            body_size: Size in bytes of the serialized request.
+            estimated_tokens: Tokens reserved by ``acquire``.
+            prompt_tokens: Prompt tokens reported in the completion usage.
+            total_tokens: Total tokens reported in the completion usage.
+
+        """
+        with self._lock:
+            self._tokens -= total_tokens - estimated_tokens
+            if body_size and prompt_tokens:
+                self.tokens_per_byte += _CALIBRATION_WEIGHT * (
+                    prompt_tokens / body_size - self.tokens_per_byte
+                )
+
+
+_rate_limiters: dict[tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(
+    provider_url: str,
+    model: str,
+    requests_per_minute: int | None,
+    tokens_per_minute: int | None,
+) -> RateLimiter | None:
+    """Return the process-wide limiter for a provider and model.
+
+    The quotas passed by the first caller are used to create the limiter.
+
+    Args:
+        provider_url: The base URL of the provider, which also tells apart
+            custom providers.
+        model: The model identifier.
+        requests_per_minute: Request quota, or None for no request limit.
+        tokens_per_minute: Token quota, or None for no token limit.
+
+    Returns:
+        The shared limiter, or None when no quota is configured.
+
+    """
+    if not (requests_per_minute or tokens_per_minute):
+        return None
+    key = (provider_url, model)
+    if key not in _rate_limiters:
+        _rate_limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+    return _rate_limiters[key]
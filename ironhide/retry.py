@@ -0,0 +1,174 @@
+"""Retry policy applied to every request sent to a provider."""
+
+import logging
+import random
+import re
+import time
+from asyncio import sleep
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import TypeVar
+
+import httpx
+from pydantic import BaseModel, Field, ValidationError
+
+from ironhide.settings import settings
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(value: str) -> float | None:
+    """Parse durations such as ``"20ms"``, ``"1.5s"`` or ``"6m0s"`` into seconds."""
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Extract how long the provider asked us to wait before retrying.
+
+    Honors ``retry-after-ms``, ``Retry-After`` (seconds or HTTP date) and the
+    OpenAI style ``x-ratelimit-reset-*`` headers of exhausted limits.
+
+    Args:
+        response: The failed response.
+
+    Returns:
+        The delay in seconds, or ``None`` if the provider gave no hint.
+
+    """
+    headers = response.headers
+    if value := headers.get("retry-after-ms"):
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if value := headers.get("retry-after"):
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+            except (TypeError, ValueError):
+                pass
+    resets = [
+        _parse_duration(headers[f"x-ratelimit-reset-{kind}"])
+        for kind in ("requests", "tokens")
+        if headers.get(f"x-ratelimit-remaining-{kind}") == "0"
+        and f"x-ratelimit-reset-{kind}" in headers
+    ]
+    return max((reset for reset in resets if reset is not None), default=None)
+
+
+class RetryPolicy(BaseModel):
+    """Exponential backoff with full jitter, bounded by an optional deadline.
+
+    Defaults are read from ``settings`` when the policy is created. Subclass
+    and override ``is_retryable`` or ``compute_delay`` to customize it.
+    """
+
+    max_retries: int = Field(default_factory=lambda: settings.ironhide_max_retries)
+    base_delay: float = Field(default_factory=lambda: settings.ironhide_retry_delay)
+    max_delay: float = Field(default_factory=lambda: settings.ironhide_retry_max_delay)
+    multiplier: float = Field(
+        default_factory=lambda: settings.ironhide_retry_multiplier,
+    )
+    jitter: bool = Field(default_factory=lambda: settings.ironhide_retry_jitter)
+    deadline: float | None = Field(
+        default_factory=lambda: settings.ironhide_retry_deadline,
+    )
+    retry_statuses: frozenset[int] = frozenset(
+        {
+            HTTPStatus.TOO_MANY_REQUESTS,
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+            HTTPStatus.BAD_GATEWAY,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            HTTPStatus.GATEWAY_TIMEOUT,
+        },
+    )
+
+    def is_retryable(self, exc: Exception) -> bool:
+        """Tell whether a failed attempt is worth retrying.
+
+        Args:
+            exc: The exception raised by the attempt.
+
+        Returns:
+            True for retryable statuses, timeouts, connection errors and
+            malformed completions.
+
+        """
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in self.retry_statuses
+        return isinstance(
+            exc,
+            httpx.TimeoutException
+            | httpx.ConnectError
+            | httpx.RemoteProtocolError
+            | ValidationError,
+        )
+
+    def compute_delay(self, attempt: int, exc: Exception) -> float:
+        """Compute how long to sleep before the next attempt.
+
+        Args:
+            attempt: Number of retries already performed.
+            exc: The exception raised by the last attempt.
+
+        Returns:
+            The delay in seconds.
+
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier**attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)  # noqa: S311
+        if isinstance(exc, httpx.HTTPStatusError):
+            delay = max(delay, retry_after(exc.response) or 0)
+        return delay
+
+    async def run(self, attempt: Callable[[], Awaitable[R]]) -> R:
+        """Await ``attempt`` until it succeeds or retrying is no longer allowed.
+
+        Args:
+            attempt: Callable performing one attempt of the request.
+
+        Returns:
+            The result of the first successful attempt.
+
+        """
+        start = time.monotonic()
+        retries = 0
+        while True:
+            try:
+                return await attempt()
+            except Exception as exc:
+                if retries >= self.max_retries or not self.is_retryable(exc):
+                    raise
+                delay = self.compute_delay(retries, exc)
+                if (
+                    self.deadline is not None
+                    and time.monotonic() - start + delay > self.deadline
+                ):
+                    raise
+                retries += 1
+                logger.warning(
+                    "Request failed with %s, retrying in %.2fs (%d/%d)...",
+                    _describe(exc),
+                    delay,
+                    retries,
+                    self.max_retries,
+                )
+                await sleep(delay)
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"status {exc.response.status_code}"
+    return type(exc).__name__
@@ -0,0 +1,199 @@
+"""Embedding-based cache answering near-duplicate user inputs.
+
+Requires numpy, installed with the ``semantic`` extra.
+"""
+
+from abc import ABC, abstractmethod
+
+import httpx
+import numpy as np
+from numpy.typing import NDArray
+from pydantic import BaseModel, SecretStr
+
+from ironhide.retry import RetryPolicy
+from ironhide.settings import settings
+from ironhide.transport import get_client
+
+type Vector = NDArray[np.float32]
+
+
+class Embedder(ABC):
+    """Turns texts into embedding vectors."""
+
+    @abstractmethod
+    async def embed(self, text: str) -> list[float]:
+        """Embed a text.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            The embedding vector.
+
+        """
+
+
+class _Embedding(BaseModel):
+    embedding: list[float]
+
+
+class _EmbeddingResponse(BaseModel):
+    data: list[_Embedding]
+
+
+class ProviderEmbedder(Embedder):
+    """Embedder calling the ``embeddings`` endpoint of an OpenAI-compatible provider."""
+
+    def __init__(
+        self,
+        provider_url: str,
+        api_key: SecretStr,
+        model: str | None = None,
+        client: httpx.AsyncClient | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """Initialize the embedder.
+
+        Args:
+            provider_url: The provider URL, e.g. ``https://api.openai.com/v1/``.
+            api_key: The provider API key.
+            model: Embedding model. Defaults to ``ironhide_embeddings_model``.
+            client: Optional HTTP client. Defaults to the pooled client.
+            retry_policy: Optional retry policy. Defaults to one built from settings.
+
+        """
+        self.provider_url = provider_url
+        self.api_key = api_key
+        self.model = model or settings.ironhide_embeddings_model
+        self.client = client
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed a text with the provider.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            The embedding vector.
+
+        """
+
+        async def attempt() -> _EmbeddingResponse:
+            response = await (self.client or get_client(self.provider_url)).post(
+                self.provider_url + "embeddings",
+                headers={"Authorization": f"Bearer {self.api_key.get_secret_value()}"},
+                json={"model": self.model, "input": text},
+                timeout=settings.ironhide_request_timeout,
+            )
+            response.raise_for_status()
+            return _EmbeddingResponse.model_validate_json(response.content)
+
+        return (await self.retry_policy.run(attempt)).data[0].embedding
+
+
+class _Index:
+    """Fixed-size ring buffer of normalized vectors and their answers."""
+
+    def __init__(self, maxsize: int, dimensions: int) -> None:
+        self.vectors: Vector = np.zeros((maxsize, dimensions), dtype=np.float32)
+        self.answers: list[str] = []
+        self.next = 0
+
+    def search(self, vector: Vector) -> tuple[float, int]:
+        scores = self.vectors[: len(self.answers)] @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), best
+
+    def add(self, vector: Vector, answer: str) -> None:
+        self.vectors[self.next] = vector
+        if len(self.answers) < len(self.vectors):
+            self.answers.append(answer)
+        else:
+            self.answers[self.next] = answer
+        self.next = (self.next + 1) % len(self.vectors)
+
+
+class SemanticCache:
+    """Cache of answers looked up by cosine similarity of the user input.
+
+    Entries are partitioned by namespace, so agents with different models,
+    instructions or response formats never share answers. When a namespace
+    is full the oldest entry is replaced.
+
+    Agents only consult the cache for the first message of a conversation,
+    when the history holds nothing else, so follow-up questions are never
+    answered from another conversation. Answers that depend on state kept
+    outside the history and instructions, such as the user behind a
+    session, should not go through a shared cache.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        threshold: float | None = None,
+        maxsize: int | None = None,
+    ) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            embedder: The embedder used for inputs.
+            threshold: Minimum cosine similarity of a hit. Defaults to
+                ``ironhide_semantic_cache_threshold``.
+            maxsize: Maximum entries per namespace. Defaults to
+                ``ironhide_semantic_cache_size``.
+
+        """
+        self.embedder = embedder
+        self.threshold = threshold or settings.ironhide_semantic_cache_threshold
+        self.maxsize = maxsize or settings.ironhide_semantic_cache_size
+        self.hits = 0
+        self.misses = 0
+        self._indexes: dict[str, _Index] = {}
+
+    async def embed(self, text: str) -> Vector:
+        """Embed and normalize a text.
+
+        Args:
+            text: The user input.
+
+        Returns:
+            The unit-length embedding.
+
+        """
+        vector = np.asarray(await self.embedder.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, vector: Vector, namespace: str = "") -> str | None:
+        """Find the answer of the most similar cached input.
+
+        Args:
+            vector: The normalized embedding of the input.
+            namespace: The partition to search.
+
+        Returns:
+            The cached answer, or None if nothing is similar enough.
+
+        """
+        index = self._indexes.get(namespace)
+        if index is not None and index.answers:
+            score, position = index.search(vector)
+            if score >= self.threshold:
+                self.hits += 1
+                return index.answers[position]
+        self.misses += 1
+        return None
+
+    def add(self, vector: Vector, answer: str, namespace: str = "") -> None:
+        """Store the answer to an input.
+
+        Args:
+            vector: The normalized embedding of the input.
+            answer: The answer to return for similar inputs.
+            namespace: The partition to store it in.
+
+        """
+        if namespace not in self._indexes:
+            self._indexes[namespace] = _Index(self.maxsize, len(vector))
+        self._indexes[namespace].add(vector, answer)
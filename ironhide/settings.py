@@ -1,5 +1,7 @@
 """Settings configuration for the Ironhide framework, including API endpoints, keys, models, and general options."""
 
+from typing import Literal
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 
@@ -16,12 +18,85 @@ class Settings(BaseSettings):
     ironhide_completions_model: str = "gpt-4o-mini"
     ironhide_transcription_model: str = "whisper-1"
     ironhide_transcription_api_key: SecretStr = SecretStr("")
+    ironhide_transcription_chunk_seconds: float = 60.0
+    ironhide_transcription_max_chunk_bytes: int = 24 * 1024 * 1024
+    ironhide_transcription_silence_window: float = 5.0
+    ironhide_transcription_concurrency: int = 4
 
     # General
     log_level: str = "INFO"
+    ironhide_log_max_chars: int = 500
     ironhide_request_timeout: int = 60
     ironhide_max_retries: int = 5
     ironhide_retry_delay: int = 3
+    ironhide_retry_max_delay: float = 60.0
+    ironhide_retry_multiplier: float = 2.0
+    ironhide_retry_jitter: bool = True
+    ironhide_retry_deadline: float | None = None
+    ironhide_structured_repair: Literal["replay", "reformat", "feedback"] = "replay"
+    ironhide_repair_prompt: str = (
+        "Your previous answer does not match the required format ({errors}). "
+        "Answer again with only the corrected JSON."
+    )
+
+    # Response format schemas
+    ironhide_schema_cache_size: int = 128
+
+    # Rate limiting (per provider and model, shared by all agents)
+    ironhide_rate_limit_rpm: int | None = None
+    ironhide_rate_limit_tpm: int | None = None
+
+    # Batch API
+    ironhide_batch_poll_interval: float = 30.0
+    ironhide_batch_completion_window: str = "24h"
+    ironhide_batch_max_wait: float | None = None
+
+    # Fan-out
+    ironhide_run_concurrency: int = 16
+
+    # Completion cache
+    ironhide_cache_size: int = 1024
+    ironhide_sqlite_cache_size: int = 100000
+    ironhide_cache_ttl: float | None = None
+
+    # Semantic cache
+    ironhide_embeddings_model: str = "text-embedding-3-small"
+    ironhide_semantic_cache_threshold: float = 0.95
+    ironhide_semantic_cache_size: int = 10000
+
+    # Connection pool
+    ironhide_shared_client: bool = True
+    ironhide_pool_max_connections: int = 100
+    ironhide_pool_max_keepalive_connections: int = 20
+    ironhide_pool_keepalive_expiry: float = 30.0
+    ironhide_http2: bool = False
+
+    # Tools
+    ironhide_tool_concurrency: int = 8
+    ironhide_tool_timeout: float | None = None
+    ironhide_tool_thread_workers: int = 16
+
+    # Prompt caching
+    ironhide_prompt_cache: bool = False
+
+    # Images
+    ironhide_image_max_size: int | None = None
+    ironhide_image_quality: int = 85
+    ironhide_image_retention: int | None = None
+
+    # Context window
+    ironhide_context_budget: int | None = None
+    ironhide_summary_prompt: str = (
+        "Summarize the conversation so far in a few sentences, keeping every "
+        "fact, decision and open question needed to continue it."
+    )
+
+    # Conversation store
+    ironhide_history_turns: int | None = None
+
+    # Usage accounting
+    ironhide_usage_history_size: int | None = 1000
+    ironhide_ledger_batch_size: int = 100
 
 
 settings = Settings()
@@ -0,0 +1,57 @@
+"""Sqlite connection shared by the threads of the on-disk caches and stores."""
+
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class SqliteDatabase:
+    """A sqlite database in WAL mode, used by one thread at a time.
+
+    The connection is opened with ``check_same_thread=False`` so blocking
+    calls can run in ``asyncio.to_thread``; a lock serializes them.
+    """
+
+    def __init__(self, path: str | Path, *schema: str) -> None:
+        """Open the database, creating its tables if needed.
+
+        Args:
+            path: Location of the sqlite file.
+            schema: ``CREATE ... IF NOT EXISTS`` statements to run.
+
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self.transaction() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in schema:
+                connection.execute(statement)
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Hold the lock for queries that do not write.
+
+        Yields:
+            The connection.
+
+        """
+        with self._lock:
+            yield self._connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Hold the lock for a transaction, committed unless it raises.
+
+        Yields:
+            The connection.
+
+        """
+        with self._lock, self._connection:
+            yield self._connection
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            self._connection.close()
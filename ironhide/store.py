@@ -0,0 +1,332 @@
+"""Persistent conversation stores, written append-only and loaded lazily."""
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from pathlib import Path
+
+from ironhide.sqlite import SqliteDatabase
+
+# A message as stored: its role, its serialized JSON and whether it is a user
+# input starting a turn, as opposed to a prompt the agent sent as the user.
+type StoredMessage = tuple[str, bytes, bool]
+
+
+class ConversationStore(ABC):
+    """Keeps the messages of conversations, identified by a conversation id.
+
+    Messages are only ever appended, in the order they were added to the
+    conversation, so saving a turn never rewrites the earlier history.
+    """
+
+    @abstractmethod
+    async def append(
+        self,
+        conversation_id: str,
+        messages: Sequence[StoredMessage],
+    ) -> None:
+        """Add messages at the end of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+            messages: The new messages, oldest first.
+
+        """
+
+    @abstractmethod
+    async def load(
+        self,
+        conversation_id: str,
+        last_turns: int | None = None,
+    ) -> list[StoredMessage]:
+        """Read a conversation, or only its most recent turns.
+
+        Args:
+            conversation_id: The conversation.
+            last_turns: Number of turns to read, each starting with a user
+                input, or None to read every message.
+
+        Returns:
+            The messages, oldest first. Empty for an unknown conversation.
+
+        """
+
+    @abstractmethod
+    async def set_summary(self, conversation_id: str, summary: str) -> None:
+        """Record the latest summary of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+            summary: The summary text.
+
+        """
+
+    @abstractmethod
+    async def get_summary(self, conversation_id: str) -> str | None:
+        """Read the latest summary of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+
+        Returns:
+            The summary, or None if none was recorded.
+
+        """
+
+    @abstractmethod
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation and its summary.
+
+        Args:
+            conversation_id: The conversation.
+
+        """
+
+
+def _last_turns(
+    messages: Sequence[StoredMessage],
+    last_turns: int | None,
+) -> list[StoredMessage]:
+    if last_turns is None:
+        return list(messages)
+    if last_turns == 0:
+        return []
+    starts = [index for index, (_, _, turn) in enumerate(messages) if turn]
+    if len(starts) <= last_turns:
+        return list(messages)
+    return list(messages[starts[-last_turns] :])
+
+
+class MemoryStore(ConversationStore):
+    """In-process store, lost when the process exits."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._messages: dict[str, list[StoredMessage]] = {}
+        self._summaries: dict[str, str] = {}
+
+    async def append(
+        self,
+        conversation_id: str,
+        messages: Sequence[StoredMessage],
+    ) -> None:
+        """Add messages at the end of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+            messages: The new messages, oldest first.
+
+        """
+        self._messages.setdefault(conversation_id, []).extend(messages)
+
+    async def load(
+        self,
+        conversation_id: str,
+        last_turns: int | None = None,
+    ) -> list[StoredMessage]:
+        """Read a conversation, or only its most recent turns.
+
+        Args:
+            conversation_id: The conversation.
+            last_turns: Number of turns to read, or None for every message.
+
+        Returns:
+            The messages, oldest first.
+
+        """
+        return _last_turns(self._messages.get(conversation_id, []), last_turns)
+
+    async def set_summary(self, conversation_id: str, summary: str) -> None:
+        """Record the latest summary of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+            summary: The summary text.
+
+        """
+        self._summaries[conversation_id] = summary
+
+    async def get_summary(self, conversation_id: str) -> str | None:
+        """Read the latest summary of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+
+        Returns:
+            The summary, or None.
+
+        """
+        return self._summaries.get(conversation_id)
+
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation and its summary.
+
+        Args:
+            conversation_id: The conversation.
+
+        """
+        self._messages.pop(conversation_id, None)
+        self._summaries.pop(conversation_id, None)
+
+
+class SqliteStore(ConversationStore):
+    """On-disk store backed by a sqlite database, one row per message.
+
+    Several processes may append to the same conversation at once.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the store at ``path``.
+
+        Args:
+            path: Location of the sqlite file.
+
+        """
+        self._database = SqliteDatabase(
+            path,
+            "CREATE TABLE IF NOT EXISTS messages (conversation_id TEXT NOT NULL, "
+            "position INTEGER NOT NULL, role TEXT NOT NULL, json BLOB NOT NULL, "
+            "turn INTEGER NOT NULL, PRIMARY KEY (conversation_id, position))",
+            "CREATE INDEX IF NOT EXISTS messages_turns "
+            "ON messages (conversation_id, turn, position)",
+            "CREATE TABLE IF NOT EXISTS summaries "
+            "(conversation_id TEXT PRIMARY KEY, summary TEXT NOT NULL)",
+        )
+
+    def _insert(self, conversation_id: str, messages: Sequence[StoredMessage]) -> None:
+        with self._database.transaction() as connection:
+            # The write lock is taken before reading the last position, so
+            # other processes appending to the conversation wait for it.
+            connection.execute("BEGIN IMMEDIATE")
+            (start,) = connection.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM messages "
+                "WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()
+            connection.executemany(
+                "INSERT INTO messages VALUES (?, ?, ?, ?, ?)",
+                [
+                    (conversation_id, start + offset, role, json, turn)
+                    for offset, (role, json, turn) in enumerate(messages)
+                ],
+            )
+
+    def _select(
+        self,
+        conversation_id: str,
+        last_turns: int | None,
+    ) -> list[StoredMessage]:
+        if last_turns == 0:
+            return []
+        with self._database.read() as connection:
+            start = 0
+            if last_turns is not None:
+                row = connection.execute(
+                    "SELECT position FROM messages "
+                    "WHERE conversation_id = ? AND turn = 1 "
+                    "ORDER BY position DESC LIMIT 1 OFFSET ?",
+                    (conversation_id, max(last_turns - 1, 0)),
+                ).fetchone()
+                if row is not None:
+                    start = row[0]
+            rows = connection.execute(
+                "SELECT role, json, turn FROM messages "
+                "WHERE conversation_id = ? AND position >= ? ORDER BY position",
+                (conversation_id, start),
+            ).fetchall()
+        return [(role, bytes(json), bool(turn)) for role, json, turn in rows]
+
+    def _execute(self, query: str, parameters: tuple[str, ...]) -> None:
+        with self._database.transaction() as connection:
+            connection.execute(query, parameters)
+
+    async def append(
+        self,
+        conversation_id: str,
+        messages: Sequence[StoredMessage],
+    ) -> None:
+        """Insert messages after the last stored one, in a single transaction.
+
+        Args:
+            conversation_id: The conversation.
+            messages: The new messages, oldest first.
+
+        """
+        if messages:
+            await asyncio.to_thread(self._insert, conversation_id, messages)
+
+    async def load(
+        self,
+        conversation_id: str,
+        last_turns: int | None = None,
+    ) -> list[StoredMessage]:
+        """Read a conversation, or only its most recent turns.
+
+        Only the requested rows are read from the database.
+
+        Args:
+            conversation_id: The conversation.
+            last_turns: Number of turns to read, or None for every message.
+
+        Returns:
+            The messages, oldest first.
+
+        """
+        return await asyncio.to_thread(self._select, conversation_id, last_turns)
+
+    async def set_summary(self, conversation_id: str, summary: str) -> None:
+        """Record the latest summary of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+            summary: The summary text.
+
+        """
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO summaries VALUES (?, ?)",
+            (conversation_id, summary),
+        )
+
+    async def get_summary(self, conversation_id: str) -> str | None:
+        """Read the latest summary of a conversation.
+
+        Args:
+            conversation_id: The conversation.
+
+        Returns:
+            The summary, or None.
+
+        """
+
+        def select() -> str | None:
+            with self._database.read() as connection:
+                row = connection.execute(
+                    "SELECT summary FROM summaries WHERE conversation_id = ?",
+                    (conversation_id,),
+                ).fetchone()
+            return None if row is None else str(row[0])
+
+        return await asyncio.to_thread(select)
+
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation and its summary.
+
+        Args:
+            conversation_id: The conversation.
+
+        """
+
+        def delete() -> None:
+            with self._database.transaction() as connection:
+                for table in ("messages", "summaries"):
+                    connection.execute(
+                        f"DELETE FROM {table} WHERE conversation_id = ?",  # noqa: S608
+                        (conversation_id,),
+                    )
+
+        await asyncio.to_thread(delete)
+
+    def close(self) -> None:
+        """Close the store database."""
+        self._database.close()
@@ -0,0 +1,343 @@
+"""Timing spans and counters of every chat turn, sent to a pluggable collector.
+
+Nothing is measured unless an agent has a ``collector``. Spans nest across
+``await`` points and tasks through a context variable, mirroring the
+OpenTelemetry model, and ``OpenTelemetryCollector`` forwards them to an
+OpenTelemetry tracer when the ``otel`` extra is installed.
+"""
+
+import bisect
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Span as OtelSpan
+    from opentelemetry.trace import Tracer
+
+type AttributeValue = str | int | float | bool
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BOUNDS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)  # fmt: skip
+
+_KEY_ATTRIBUTES = ("provider", "model", "tool")
+
+
+class Span:
+    """A timed phase of a chat turn."""
+
+    __slots__ = (
+        "_start",
+        "attributes",
+        "duration",
+        "end_ns",
+        "error",
+        "name",
+        "parent",
+        "start_ns",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        attributes: dict[str, AttributeValue],
+        parent: "Span | None",
+    ) -> None:
+        """Start the span.
+
+        Args:
+            name: The phase, e.g. ``"request"`` or ``"tool"``.
+            attributes: Details of the phase, completed while it runs.
+            parent: The enclosing span, if any.
+
+        """
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.error: str | None = None
+        self.start_ns = time.time_ns()
+        self.end_ns = self.start_ns
+        self.duration = 0.0
+        self._start = time.perf_counter()
+
+    def finish(self) -> None:
+        """Stop the span's clock."""
+        self.duration = time.perf_counter() - self._start
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+
+
+_current_span: ContextVar[Span | None] = ContextVar("ironhide_span", default=None)
+
+
+class Collector(ABC):
+    """Receives the spans and counters of the agents using it."""
+
+    def on_start(self, span: Span) -> None:  # noqa: B027
+        """Handle a span that just started.
+
+        Args:
+            span: The started span.
+
+        """
+
+    @abstractmethod
+    def on_end(self, span: Span) -> None:
+        """Handle a finished span.
+
+        Args:
+            span: The finished span, with its duration and final attributes.
+
+        """
+
+    def increment(  # noqa: B027
+        self,
+        name: str,
+        value: float = 1,
+        attributes: dict[str, AttributeValue] | None = None,
+    ) -> None:
+        """Add to a counter, e.g. ``"retries"`` or ``"request_bytes"``.
+
+        Args:
+            name: The counter.
+            value: The amount to add.
+            attributes: Details such as the provider and model.
+
+        """
+
+
+@contextmanager
+def span(
+    collector: Collector | None,
+    name: str,
+    **attributes: AttributeValue,
+) -> Iterator[Span | None]:
+    """Time the enclosed block as a child of the current span.
+
+    Args:
+        collector: The collector receiving the span, or None to do nothing.
+        name: The phase being timed.
+        **attributes: Initial attributes of the span.
+
+    Yields:
+        The running span, or None without a collector.
+
+    """
+    if collector is None:
+        yield None
+        return
+    current = Span(name, attributes, _current_span.get())
+    token = _current_span.set(current)
+    collector.on_start(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = type(exc).__name__
+        raise
+    finally:
+        current.finish()
+        _current_span.reset(token)
+        collector.on_end(current)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, as used by OpenTelemetry metrics."""
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            bounds: Sorted upper bounds of the buckets, in seconds.
+
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value.
+
+        Args:
+            value: The duration in seconds.
+
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket holding it.
+
+        Args:
+            q: The quantile, between 0 and 1.
+
+        Returns:
+            The estimate in seconds, capped by the largest value observed.
+
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts, strict=False):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsCollector(Collector):
+    """Aggregate spans into latency histograms and counters, in memory.
+
+    Histograms and counters are keyed by name plus the ``provider``,
+    ``model`` and ``tool`` attributes.
+    """
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS) -> None:
+        """Initialize empty metrics.
+
+        Args:
+            bounds: Upper bounds of the histogram buckets, in seconds.
+
+        """
+        self.bounds = bounds
+        self.histograms: dict[tuple[str, ...], Histogram] = {}
+        self.counters: dict[tuple[str, ...], float] = {}
+
+    @staticmethod
+    def _key(name: str, attributes: dict[str, AttributeValue]) -> tuple[str, ...]:
+        return (name, *(str(attributes.get(key, "")) for key in _KEY_ATTRIBUTES))
+
+    def on_end(self, span: Span) -> None:
+        """Add the span's duration to its histogram.
+
+        Args:
+            span: The finished span.
+
+        """
+        key = self._key(span.name, span.attributes)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(self.bounds)
+        self.histograms[key].observe(span.duration)
+        if span.error:
+            self.increment(f"{span.name}_errors", attributes=span.attributes)
+
+    def increment(
+        self,
+        name: str,
+        value: float = 1,
+        attributes: dict[str, AttributeValue] | None = None,
+    ) -> None:
+        """Add to a counter.
+
+        Args:
+            name: The counter.
+            value: The amount to add.
+            attributes: Details such as the provider and model.
+
+        """
+        key = self._key(name, attributes or {})
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """Summarize the metrics collected so far.
+
+        Returns:
+            The histograms, with count, mean, p50, p95, p99 and max in
+            seconds, and the counters.
+
+        """
+        return {
+            "histograms": [
+                {
+                    **dict(zip(("name", *_KEY_ATTRIBUTES), key, strict=True)),
+                    "count": histogram.count,
+                    "mean": histogram.total / histogram.count,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                    "max": histogram.max,
+                }
+                for key, histogram in self.histograms.items()
+            ],
+            "counters": [
+                {
+                    **dict(zip(("name", *_KEY_ATTRIBUTES), key, strict=True)),
+                    "value": value,
+                }
+                for key, value in self.counters.items()
+            ],
+        }
+
+
+class OpenTelemetryCollector(Collector):
+    """Forward spans to an OpenTelemetry tracer.
+
+    Requires ``opentelemetry-api``, installed with the ``otel`` extra.
+    Spans without an ironhide parent nest under the active OpenTelemetry
+    span. Counters are added to the current span as events.
+    """
+
+    def __init__(self, tracer: "Tracer | None" = None) -> None:
+        """Initialize the collector.
+
+        Args:
+            tracer: The tracer to use. Defaults to the global ``ironhide`` tracer.
+
+        """
+        from opentelemetry import trace  # noqa: PLC0415
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("ironhide")
+        self._spans: dict[int, OtelSpan] = {}
+
+    def on_start(self, span: Span) -> None:
+        """Start the matching OpenTelemetry span.
+
+        Args:
+            span: The started span.
+
+        """
+        parent = self._spans.get(id(span.parent)) if span.parent else None
+        self._spans[id(span)] = self.tracer.start_span(
+            f"ironhide.{span.name}",
+            context=self._trace.set_span_in_context(parent) if parent else None,
+            start_time=span.start_ns,
+        )
+
+    def on_end(self, span: Span) -> None:
+        """End the matching OpenTelemetry span.
+
+        Args:
+            span: The finished span.
+
+        """
+        otel_span = self._spans.pop(id(span))
+        otel_span.set_attributes(span.attributes)
+        if span.error:
+            otel_span.set_status(self._trace.StatusCode.ERROR, span.error)
+        otel_span.end(end_time=span.end_ns)
+
+    def increment(
+        self,
+        name: str,
+        value: float = 1,
+        attributes: dict[str, AttributeValue] | None = None,
+    ) -> None:
+        """Record the counter as an event of the current span.
+
+        Args:
+            name: The counter.
+            value: The amount to add.
+            attributes: Details such as the provider and model.
+
+        """
+        current = _current_span.get()
+        otel_span = self._spans.get(id(current)) if current else None
+        if otel_span is not None:
+            otel_span.add_event(name, {**(attributes or {}), "value": value})
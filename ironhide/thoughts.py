@@ -0,0 +1,54 @@
+"""Chain-of-thought steps and the dependencies between them."""
+
+from pydantic import BaseModel
+
+
+class Thought(BaseModel):
+    """A chain-of-thought step that only needs the answers of some earlier steps.
+
+    Steps without dependencies are requested concurrently against the same
+    snapshot of the conversation.
+    """
+
+    prompt: str
+    depends_on: tuple[int, ...] = ()
+
+
+def resolve_thoughts(
+    chain: tuple[str | Thought, ...],
+    *,
+    parallel: bool = False,
+) -> list[tuple[str, frozenset[int]]] | None:
+    """Resolve the prompt and transitive dependencies of every step.
+
+    Plain strings depend on the previous step, or on nothing when
+    ``parallel`` is set.
+
+    Args:
+        chain: The chain-of-thought steps, in declared order.
+        parallel: Whether plain strings are independent of each other.
+
+    Returns:
+        For each step, its prompt and the indexes of every step it needs,
+        or None when the chain is strictly sequential.
+
+    Raises:
+        ValueError: If a step depends on itself or on a later step.
+
+    """
+    steps: list[tuple[str, frozenset[int]]] = []
+    sequential = True
+    for index, step in enumerate(chain):
+        if isinstance(step, Thought):
+            prompt, depends_on = step.prompt, step.depends_on
+        else:
+            prompt, depends_on = step, () if parallel or not index else (index - 1,)
+        if any(not 0 <= dependency < index for dependency in depends_on):
+            message = f"Thought {index} can only depend on earlier steps: {depends_on}"
+            raise ValueError(message)
+        sequential = sequential and depends_on == ((index - 1,) if index else ())
+        closure = frozenset(depends_on).union(
+            *(steps[dependency][1] for dependency in depends_on),
+        )
+        steps.append((prompt, closure))
+    return None if sequential else steps
@@ -0,0 +1,57 @@
+"""Process-wide pool of HTTP clients shared by every agent talking to the same provider."""
+
+import asyncio
+from weakref import WeakKeyDictionary
+
+import httpx
+
+from ironhide.settings import settings
+
+_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = (
+    WeakKeyDictionary()
+)
+
+
+def make_client() -> httpx.AsyncClient:
+    """Create a new client configured with the pool limits from ``settings``.
+
+    Returns:
+        A fresh ``httpx.AsyncClient`` owned by the caller.
+
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.ironhide_pool_max_connections,
+            max_keepalive_connections=settings.ironhide_pool_max_keepalive_connections,
+            keepalive_expiry=settings.ironhide_pool_keepalive_expiry,
+        ),
+        http2=settings.ironhide_http2,
+        timeout=settings.ironhide_request_timeout,
+    )
+
+
+def get_client(base_url: str) -> httpx.AsyncClient:
+    """Return the shared client for ``base_url``, creating it on first use.
+
+    Clients are scoped to the running event loop because their connections
+    cannot be reused across loops.
+
+    Args:
+        base_url: The provider URL the client will talk to.
+
+    Returns:
+        The pooled ``httpx.AsyncClient`` for that provider.
+
+    """
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = loop_clients[base_url] = make_client()
+    return client
+
+
+async def aclose_clients() -> None:
+    """Close every pooled client of the running event loop."""
+    loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.aclose()
@@ -22,6 +22,82 @@ def get_prompt(file_path: str, prompt: str) -> str:
         return system_file.read()
 
 
+def truncate_payload(payload: Any, max_chars: int) -> Any:  # noqa: ANN401
+    """Shorten long strings in a JSON-ready payload, e.g. base64 images.
+
+    Args:
+        payload: A structure of dicts, lists and scalars as produced by ``model_dump``.
+        max_chars: Strings longer than this are cut and annotated with their size.
+
+    Returns:
+        A copy of the payload with every long string truncated.
+
+    """
+    if isinstance(payload, str) and len(payload) > max_chars:
+        return f"{payload[:max_chars]}... [{len(payload)} chars]"
+    if isinstance(payload, dict):
+        return {
+            key: truncate_payload(value, max_chars) for key, value in payload.items()
+        }
+    if isinstance(payload, list):
+        return [truncate_payload(item, max_chars) for item in payload]
+    return payload
+
+
+def _scan_json(text: str) -> tuple[int, list[str], bool]:
+    """Find where the first JSON value of ``text`` ends.
+
+    Returns:
+        The index of its last character, or -1 if it is unterminated, the
+        closers still pending and whether it stops inside a string.
+
+    """
+    closers: list[str] = []
+    in_string = escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            in_string = escaped or char != '"'
+            escaped = not escaped and char == "\\"
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+            if not closers:
+                return index, closers, False
+    return -1, closers, in_string
+
+
+def repair_json(text: str) -> str:
+    """Recover the JSON value of a model answer, e.g. fenced or truncated.
+
+    Strips Markdown fences and surrounding prose, and closes the strings,
+    arrays and objects left open by a truncated answer. The result is not
+    guaranteed to be valid.
+
+    Args:
+        text: The raw answer.
+
+    Returns:
+        The best-effort JSON text.
+
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return text
+    text = text[min(starts) :]
+    end, closers, in_string = _scan_json(text)
+    if end != -1:
+        return text[: end + 1]
+    if in_string:
+        text = text.removesuffix("\\") + '"'
+    text = text.rstrip().removesuffix(",")
+    if text.endswith(":"):
+        text += "null"
+    return text + "".join(reversed(closers))
+
+
 class Provider(str, Enum):
     """Enumeration of supported AI service providers."""
 